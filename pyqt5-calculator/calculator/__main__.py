@@ -1,10 +1,55 @@
 from PyQt5.QtWidgets import QApplication
 from main_window import MainWindow
+from numeric_backends import backends, create_backend
+from profiling import Profiler
+import argparse
+import headless
 import sys
+
+EVAL_OPTIONS = ("-e", "--eval")
+
+def glue_expressions(argv: list[str]) -> list[str]:
+    """
+    Склеивает -e/--eval со следующим аргументом в "--eval=выражение",
+    иначе argparse принял бы выражение с минусом в начале (-2+3) за неизвестный ключ
+    """
+    result = []
+    i = 0
+    while i < len(argv):
+        if argv[i] in EVAL_OPTIONS and i + 1 < len(argv):
+            result.append(f"--eval={argv[i + 1]}")
+            i += 2
+        else:
+            result.append(argv[i])
+            i += 1
+    return result
     
 def main():
-    app = QApplication(sys.argv)
-    window = MainWindow()
+    parser = argparse.ArgumentParser(prog="calculator")
+    parser.add_argument("--headless", action="store_true", help="вычислять выражения без окна")
+    parser.add_argument("--stats", action="store_true", help="печатать статистику кэша (headless)")
+    parser.add_argument("--mode", choices=sorted(backends), default="float", help="режим вычислений")
+    parser.add_argument("--precision", type=int, default=28, help="точность режима decimal")
+    parser.add_argument("--no-live", action="store_true", help="не показывать промежуточный результат при вводе")
+    parser.add_argument("--profile", action="store_true", help="печатать замеры этапов вычисления в stderr")
+    parser.add_argument(*EVAL_OPTIONS, dest="expressions", action="append", default=[], metavar="EXPRESSION",
+                        help="выражение для headless режима (можно повторять), без него выражения читаются из stdin")
+    # Все, что не разобрал argparse (например, -platform offscreen), - аргументы Qt
+    args, qt_args = parser.parse_known_args(glue_expressions(sys.argv[1:]))
+
+    if args.headless:
+        if qt_args:
+            parser.error(f"неизвестные аргументы: {' '.join(qt_args)}")
+        headless.main(args.expressions, args.stats, args.mode, args.precision, args.profile)
+        return
+    if args.expressions:
+        parser.error("-e/--eval работает только вместе с --headless")
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    window = MainWindow(create_backend(args.mode, args.precision), live_preview=not args.no_live)
+    if args.profile:
+        # Каждое нажатие "=" печатает время этапов
+        Profiler(keep=False, on_profile=lambda p: print(p.describe(), file=sys.stderr)).attach(window.evaluator)
     window.show()
     sys.exit(app.exec_())
 
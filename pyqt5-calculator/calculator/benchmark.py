@@ -0,0 +1,55 @@
+from calculator_logic import CalculatorLogic
+from numeric_backends import backends, create_backend
+from corpus import make_expression
+import argparse
+import random
+import time
+
+def bench_mode(mode: str, expressions: list[str], precision: int, repeat: int) -> dict:
+    """ Замеряет компиляцию и выполнение выражений в одном режиме """
+    logic = CalculatorLogic(create_backend(mode, precision))
+    token_lists = [CalculatorLogic.split_tokens(CalculatorLogic.normalize(e)) for e in expressions]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        programs = [logic.compile(tokens) for tokens in token_lists]
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for program in programs:
+            CalculatorLogic.run(program)
+    run_time = time.perf_counter() - start
+
+    count = len(expressions) * repeat
+    return {
+        "compile_us": compile_time / count * 1e6,
+        "run_us": run_time / count * 1e6
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение стоимости режимов вычислений")
+    parser.add_argument("--count", type=int, default=200, help="количество выражений")
+    parser.add_argument("--length", type=int, default=50, help="чисел в выражении")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--precision", type=int, default=28)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    expressions = [make_expression(rng, args.length) for _ in range(args.count)]
+
+    print(f"{'mode':<10}{'compile, us':>14}{'run, us':>12}{'x float':>10}")
+    baseline = None
+    for mode in backends:
+        try:
+            result = bench_mode(mode, expressions, args.precision, args.repeat)
+        except ZeroDivisionError:
+            print(f"{mode:<10} деление на ноль в корпусе, смените --seed")
+            continue
+        total = result["compile_us"] + result["run_us"]
+        baseline = baseline or total
+        print(f"{mode:<10}{result['compile_us']:>14.1f}{result['run_us']:>12.1f}{total / baseline:>10.2f}")
+
+if __name__ == "__main__":
+    main()
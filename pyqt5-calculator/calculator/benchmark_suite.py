@@ -0,0 +1,142 @@
+from calculator_logic import CalculatorLogic
+from numeric_backends import backends, create_backend
+from corpus import corpora
+from pathlib import Path
+import tracemalloc
+import platform
+import argparse
+import random
+import json
+import time
+import sys
+
+DEFAULT_SIZES = [10, 100, 1_000, 10_000, 100_000, 1_000_000]
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+def evaluate(logic: CalculatorLogic, expression: str):
+    """ Полный путь вычисления без кэшей: нормализация, токены, разбор и выполнение """
+    tokens = CalculatorLogic.split_tokens(CalculatorLogic.normalize(expression))
+    return CalculatorLogic.run(logic.compile(tokens))
+
+def count_tokens(expression: str) -> int:
+    return len(CalculatorLogic.split_tokens(CalculatorLogic.normalize(expression)))
+
+def measure_peak(logic: CalculatorLogic, expression: str) -> int:
+    """ Пик памяти одного вычисления в байтах (отдельным прогоном, tracemalloc замедляет замер времени) """
+    tracemalloc.start()
+    try:
+        evaluate(logic, expression)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def bench_case(logic: CalculatorLogic, expressions: list[str]) -> dict:
+    """ Замеряет пропускную способность, задержки и пик памяти на наборе выражений одного размера """
+    tokens = sum(count_tokens(expression) for expression in expressions)
+    evaluate(logic, expressions[0]) # прогрев
+
+    latencies = []
+    for expression in expressions:
+        start = time.perf_counter()
+        evaluate(logic, expression)
+        latencies.append(time.perf_counter() - start)
+
+    total = sum(latencies)
+    return {
+        "expressions": len(expressions),
+        "tokens": tokens,
+        "tokens_per_s": tokens / total,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "peak_kb": measure_peak(logic, max(expressions, key=len)) / 1024,
+    }
+
+def run_suite(names: list[str], sizes: list[int], mode: str, precision: int, seed: int, budget: int) -> dict:
+    """
+    Прогоняет каждый корпус на каждом размере
+    Количество выражений подбирается так, чтобы на размер приходилось около budget токенов (от 3 до 200 выражений)
+    """
+    logic = CalculatorLogic(create_backend(mode, precision))
+    results = {}
+    for name in names:
+        for size in sizes:
+            rng = random.Random(f"{seed}/{name}/{size}")
+            count = min(max(budget // size, 3), 200)
+            expressions = [corpora[name](rng, size) for _ in range(count)]
+            key = f"{name}/{size}"
+            try:
+                results[key] = bench_case(logic, expressions)
+            except ArithmeticError as error:
+                results[key] = {"error": type(error).__name__}
+            print_row(key, results[key])
+    return results
+
+def print_header():
+    print(f"{'case':<16}{'tokens/s':>14}{'p50, ms':>12}{'p90, ms':>12}{'p99, ms':>12}{'peak, KB':>12}")
+
+def print_row(key: str, result: dict):
+    if "error" in result:
+        print(f"{key:<16}{result['error']:>14}")
+        return
+    print(f"{key:<16}{result['tokens_per_s']:>14,.0f}{result['p50_ms']:>12.3f}{result['p90_ms']:>12.3f}"
+          f"{result['p99_ms']:>12.3f}{result['peak_kb']:>12.1f}")
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """ Возвращает описания регрессий: падение пропускной способности или рост p50 / памяти больше threshold """
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if not old or "error" in old or "error" in result:
+            continue
+        if result["tokens_per_s"] < old["tokens_per_s"] * (1 - threshold):
+            regressions.append(f"{key}: tokens/s {old['tokens_per_s']:,.0f} -> {result['tokens_per_s']:,.0f}")
+        if result["p50_ms"] > old["p50_ms"] * (1 + threshold):
+            regressions.append(f"{key}: p50 {old['p50_ms']:.3f} -> {result['p50_ms']:.3f} ms")
+        if result["peak_kb"] > old["peak_kb"] * (1 + threshold):
+            regressions.append(f"{key}: peak {old['peak_kb']:.1f} -> {result['peak_kb']:.1f} KB")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Набор замеров CalculatorLogic на сгенерированных корпусах")
+    parser.add_argument("--corpus", nargs="+", choices=sorted(corpora), default=list(corpora))
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="токенов в выражении")
+    parser.add_argument("--mode", choices=sorted(backends), default="float")
+    parser.add_argument("--precision", type=int, default=28)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--budget", type=int, default=2_000_000, help="токенов на один размер")
+    parser.add_argument("--save", type=Path, help="сохранить результаты как базовые в JSON")
+    parser.add_argument("--compare", type=Path, help="сравнить с сохраненными базовыми результатами")
+    parser.add_argument("--threshold", type=float, default=0.1, help="допустимое ухудшение, доля")
+    args = parser.parse_args()
+
+    print_header()
+    results = run_suite(args.corpus, args.sizes, args.mode, args.precision, args.seed, args.budget)
+
+    if args.save:
+        meta = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mode": args.mode,
+            "seed": args.seed,
+            "budget": args.budget,
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        args.save.write_text(json.dumps({"meta": meta, "results": results}, indent=2), encoding="utf-8")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print("регрессии:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("регрессий нет")
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,11 @@ from PyQt5.QtWidgets import QPushButton
 class ButtonFactory():
     """ Класс для удобного создания кнопок """
     @staticmethod
-    def create_button(text: str, size: tuple, style, callback) -> QPushButton:
+    def create_button(text: str, size: tuple, variant: str, callback) -> QPushButton:
+        """ variant выбирает оформление из общей таблицы стилей (Styles.application_style) """
         button = QPushButton(text)
         button.setFixedSize(*size)
-        button.setStyleSheet(style)
+        button.setProperty("variant", variant)
         if callback:
             button.clicked.connect(callback)
         return button
\ No newline at end of file
@@ -1,4 +1,3 @@
-from styles import Styles
 from button_factory import ButtonFactory
 from PyQt5.QtWidgets import QGridLayout
 
@@ -18,7 +17,7 @@ class ButtonGrid():
         callback = None
         for i, button in enumerate(buttons, 1):
             if i in [8, 12, 16]:
-                style = Styles.orange_button_style
+                variant = "orange"
                 match button:
                     case "=": 
                         callback = window.on_equal
@@ -27,10 +26,10 @@ class ButtonGrid():
                     case "⌫": 
                         callback = window.on_backspace
             else:
-                style = Styles.white_button_style
+                variant = "white"
                 callback = lambda _, b=button: window.on_button_click(b) # noqa: E731
             
-            button = ButtonFactory.create_button(button, (80,80), style, callback)
+            button = ButtonFactory.create_button(button, (80,80), variant, callback)
 
             grid.addWidget(button, y, x)
             x = 1 if x >= 4 else x + 1
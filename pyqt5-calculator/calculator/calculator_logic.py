@@ -1,37 +1,165 @@
-from typing import List
+from typing import Any, Callable, List, Optional, Tuple
+from lru_cache import LRUCache
+from numeric_backends import FloatBackend
+
+# Шаг программы: (операция, число). Для чисел операция равна None
+Program = Tuple[Tuple[Optional[Callable], Any], ...]
 
 class CalculatorLogic():
-    """ 
-    Вычисляет арифметические выражения методом рекурсивного спуска 
-    Возвращает результат вычислений в виде float
     """
-    def a(self, tokens: List[str]) -> float:
-        result = self.b(tokens)
-        while len(tokens) > 0 and tokens[0] in ("+", "-"):
-            token = tokens.pop(0)
-            right = self.b(tokens)
-            if token == "+":
-                result += right
+    Разбирает арифметические выражения методом рекурсивного спуска
+    Компилирует их в программу для стековой машины
+    Числа и операции берутся из вычислительного режима один раз при компиляции
+    """
+    def __init__(self, backend=None):
+        self.backend = backend or FloatBackend()
+
+    @staticmethod
+    def normalize(expression: str) -> str:
+        """ Убирает лишние символы и схлопывает повторяющиеся знаки """
+        remove_chars = " []',"
+        translation_table = str.maketrans('', '', remove_chars)
+        s = expression.translate(translation_table)
+        return s.replace('--', '+').replace('+-', '-').replace('-+', '-').replace('++', '+')
+
+    @staticmethod
+    def split_tokens(s: str) -> List[str]:
+        """ Разбивает нормализованное выражение на токены и присоединяет унарные минусы к числам """
+        return CalculatorLogic.attach_unary(CalculatorLogic.tokenize(s))
+
+    @staticmethod
+    def tokenize(s: str) -> List[str]:
+        """ Разбивает нормализованное выражение на числа, знаки и скобки """
+        for char in "+-*/()":
+            s = s.replace(char, f' {char} ')
+        return s.split()
+
+    @staticmethod
+    def attach_unary(tokens: List[str]) -> List[str]:
+        """ Присоединяет унарные минусы к следующему токену (изменяет и возвращает тот же список) """
+        i = 0
+        while i < len(tokens):
+            if tokens[i] == '-' and (i == 0 or tokens[i-1] in '+-*/(') and i+1 < len(tokens):
+                tokens[i+1] = '-' + tokens[i+1]
+                del tokens[i]
             else:
-                result -= right
-        return result
-
-    def b(self, tokens: List[str]) -> float:
-        result = self.c(tokens)
-        while len(tokens) > 0 and tokens[0] in ("*", "/"):
-            token = tokens.pop(0)
-            right = self.c(tokens)
-            if token == "*":
-                result *= right
+                i += 1
+        return tokens
+
+    def compile(self, tokens: List[str]) -> Program:
+        """ Переводит токены в программу в обратной польской записи """
+        self.program = []
+        self.nesting = 0
+        self.max_nesting = 0 # Наибольшая вложенность скобок при последнем разборе (глубина спуска)
+        self.operators = self.backend.operators
+        self.number = self.backend.number
+        self.a(tokens[::-1])
+        return tuple(self.program)
+
+    @staticmethod
+    def run(program: Program) -> Any:
+        """ Выполняет скомпилированную программу на стеке """
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        for op, value in program:
+            if op is None:
+                push(value)
             else:
-                result /= right
-        return result
+                right = pop()
+                stack[-1] = op(stack[-1], right)
+        return stack[-1]
+
+    # Методы спуска читают токены с конца перевернутого списка, чтобы pop() был O(1)
+    def a(self, tokens: List[str]):
+        self.b(tokens)
+        while len(tokens) > 0 and tokens[-1] in ("+", "-"):
+            token = tokens.pop()
+            self.b(tokens)
+            self.program.append((self.operators[token], None))
+
+    def b(self, tokens: List[str]):
+        self.c(tokens)
+        while len(tokens) > 0 and tokens[-1] in ("*", "/"):
+            token = tokens.pop()
+            self.c(tokens)
+            self.program.append((self.operators[token], None))
 
-    def c(self, tokens: List[str]) -> float:
-        token = tokens.pop(0)
+    def c(self, tokens: List[str]):
+        token = tokens.pop()
         if token == "(":
-            result = self.a(tokens)
-            tokens.pop(0)
+            self.nesting += 1
+            if self.nesting > self.max_nesting:
+                self.max_nesting = self.nesting
+            self.a(tokens)
+            self.nesting -= 1
+            tokens.pop()
         else:
-            result = float(token)
-        return result
\ No newline at end of file
+            self.program.append((None, self.number(token)))
+
+class Stages():
+    """
+    Выполняет этапы одного вычисления Evaluator без замеров
+    Profiler подставляет вместо него наследника, который замеряет каждый этап
+    """
+    def run(self, name: str, function: Callable, argument: Any) -> Any:
+        return function(argument)
+
+    def cached(self):
+        """ Результат взят из кэша, остальные этапы пропущены """
+
+    def finish(self):
+        """ Вычисление закончено (успешно или с ошибкой) """
+
+NO_STAGES = Stages()
+
+class Evaluator():
+    """
+    Вычисляет выражения из строки, кэшируя результаты
+    Ключ кэша - выражение после нормализации знаков
+    Программы отдельно не кэшируются: программа нужна только при промахе по результату,
+    а с тем же ключом кэш программ промахивался бы вместе с ним
+    """
+    def __init__(self, result_cache_size: int = 1024, backend=None):
+        self.logic = CalculatorLogic(backend)
+        self.results = LRUCache(result_cache_size)
+        self.profiler = None # Profiler из profiling.py, пока он не подключен, этапы выполняет NO_STAGES
+
+    @property
+    def backend(self):
+        return self.logic.backend
+
+    def set_backend(self, backend):
+        """ Меняет вычислительный режим, старые результаты становятся недействительны """
+        self.logic = CalculatorLogic(backend)
+        self.results.clear()
+
+    def format(self, value: Any) -> str:
+        """ Переводит результат в строку для дисплея по правилам текущего режима """
+        return self.logic.backend.format(value)
+
+    def evaluate(self, expression: str) -> Any:
+        """ Возвращает результат выражения, при возможности беря его из кэша """
+        stages = self.profiler.begin(self, expression) if self.profiler is not None else NO_STAGES
+        try:
+            key = stages.run("normalize", CalculatorLogic.normalize, expression)
+
+            result = self.results.get(key)
+            if result is not None:
+                stages.cached()
+                return result
+
+            tokens = stages.run("tokenize", CalculatorLogic.tokenize, key)
+            tokens = stages.run("unary", CalculatorLogic.attach_unary, tokens)
+            program = stages.run("parse", self.logic.compile, tokens)
+            result = stages.run("evaluate", CalculatorLogic.run, program)
+            self.results.put(key, result)
+            return result
+        finally:
+            stages.finish()
+
+    def cache_stats(self) -> dict:
+        """ Возвращает статистику кэша результатов """
+        return {
+            "results": self.results.stats()
+        }
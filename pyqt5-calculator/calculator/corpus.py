@@ -0,0 +1,98 @@
+from calculator_logic import CalculatorLogic
+from itertools import product
+from typing import Callable, Dict, List
+import random
+import sys
+
+def number(rng: random.Random) -> str:
+    """ Случайное ненулевое число с 0-3 знаками после точки """
+    return str(round(rng.uniform(1, 100), rng.randint(0, 3)))
+
+def make_expression(rng: random.Random, length: int) -> str:
+    """ Создает случайное выражение из length чисел со скобками и всеми операциями """
+    parts = []
+    depth = 0
+    for i in range(length):
+        if depth < 3 and rng.random() < 0.15:
+            parts.append("(")
+            depth += 1
+        parts.append(number(rng))
+        if depth and rng.random() < 0.2:
+            parts.append(")")
+            depth -= 1
+        if i != length - 1:
+            parts.append(rng.choice("+-*/"))
+    parts.append(")" * depth)
+    return "".join(parts)
+
+def valid_sign_runs(max_length: int = 5) -> List[str]:
+    """
+    Цепочки знаков между числами, которые после нормализации остаются правильным выражением
+    Нормализация заменяет пары знаков за один проход, поэтому подходит не любая цепочка
+    """
+    logic = CalculatorLogic()
+    runs = []
+    for length in range(1, max_length + 1):
+        for signs in product("+-", repeat=length):
+            run = "".join(signs)
+            try:
+                logic.compile(CalculatorLogic.split_tokens(CalculatorLogic.normalize(f"1{run}1")))
+            except (IndexError, ValueError, ArithmeticError):
+                continue
+            runs.append(run)
+    return runs
+
+SIGN_RUNS = valid_sign_runs()
+
+def max_nesting() -> int:
+    """ Наибольшая вложенность скобок, которую разбор выдержит с запасом до предела рекурсии """
+    # Каждый уровень скобок - три вызова a -> b -> c
+    return max((sys.getrecursionlimit() - 100) // 3, 1)
+
+def flat_chain(rng: random.Random, tokens: int) -> str:
+    """ Длинная цепочка чисел и операций без скобок """
+    count = max(tokens // 2, 1)
+    parts = [number(rng)]
+    for _ in range(count):
+        parts.append(rng.choice("+-*/"))
+        parts.append(number(rng))
+    return "".join(parts)
+
+def nested(rng: random.Random, tokens: int) -> str:
+    """ Блоки глубоко вложенных скобок вида ((a+b)*c)-d...; вложенность ограничена max_nesting() """
+    depth = min(max_nesting(), max(tokens // 4, 1))
+    parts = []
+    size = 0
+    while size < tokens:
+        if parts:
+            parts.append(rng.choice("+-*/"))
+        parts.append("(" * depth)
+        parts.append(number(rng))
+        for _ in range(depth):
+            parts.append(f"{rng.choice('+-*/')}{number(rng)})")
+        size += 4 * depth + 2
+    return "".join(parts)
+
+def unary_heavy(rng: random.Random, tokens: int) -> str:
+    """ Числа, разделенные цепочками знаков вроде --, +-, -+-, которые сворачивает нормализация """
+    count = max(tokens // 3, 1)
+    parts = [number(rng)]
+    for _ in range(count):
+        if rng.random() < 0.25:
+            # После умножения и деления допустим только одиночный унарный минус
+            parts.append(rng.choice("*/") + rng.choice(("", "-")))
+        else:
+            parts.append(rng.choice(SIGN_RUNS))
+        parts.append(number(rng))
+    return "".join(parts)
+
+def mixed(rng: random.Random, tokens: int) -> str:
+    """ Реалистичные выражения: числа, все операции и неглубокие скобки """
+    return make_expression(rng, max(tokens // 2, 1))
+
+corpora: Dict[str, Callable[[random.Random, int], str]] = {
+    "flat": flat_chain,
+    "nested": nested,
+    "unary": unary_heavy,
+    "mixed": mixed,
+}
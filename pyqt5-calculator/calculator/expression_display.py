@@ -0,0 +1,101 @@
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import Qt, QEvent, QRect, QSize
+from PyQt5.QtGui import QPainter, QColor
+from text_buffer import ChunkedText
+
+class ExpressionDisplay(QWidget):
+    """
+    Поле вывода выражения для области прокрутки
+    Хранит текст кусками с закэшированной шириной и рисует только видимые куски
+    """
+    padding_left = 5
+    padding_top = 7
+    extra_width = 30
+
+    def __init__(self, placeholder: str = ""):
+        super().__init__()
+        self.placeholder = placeholder
+        self.buffer = ChunkedText(self.measure)
+        self.setAttribute(Qt.WA_OpaquePaintEvent) # type: ignore
+
+    def measure(self, text: str) -> int:
+        return self.fontMetrics().horizontalAdvance(text)
+
+    def text(self) -> str:
+        return self.buffer.text()
+
+    def set_text(self, text: str):
+        """ Полностью заменяет текст (результат вычисления) """
+        self.buffer.clear()
+        self.buffer.append(text)
+        self.update_width()
+        self.update()
+
+    def set_placeholder(self, placeholder: str):
+        """ Очищает поле и показывает подсказку или сообщение об ошибке """
+        self.placeholder = placeholder
+        self.set_text("")
+
+    def append(self, text: str):
+        """ Дописывает текст в конец, перерисовывая только последний кусок """
+        if not self.buffer:
+            self.set_text(text)
+            return
+        tail = self.buffer.tail_offset()
+        self.buffer.append(text)
+        self.update_width()
+        self.update_tail(tail)
+
+    def remove(self, count: int):
+        """ Удаляет count последних символов """
+        self.buffer.remove(count)
+        if not self.buffer:
+            self.update() # Вернулась подсказка
+            return
+        tail = self.buffer.tail_offset()
+        self.update_width()
+        self.update_tail(tail)
+
+    def update_tail(self, offset: int):
+        self.update(QRect(self.padding_left + offset, 0, self.width(), self.height()))
+
+    def content_width(self) -> int:
+        if self.buffer:
+            width = self.buffer.width
+        else:
+            width = self.measure(self.placeholder)
+        return self.padding_left + width + self.extra_width
+
+    def update_width(self):
+        """ Растягивает поле по ширине текста, но не уже видимой области """
+        parent = self.parentWidget()
+        self.setFixedWidth(max(self.content_width(), parent.width() if parent else 0))
+
+    def sizeHint(self) -> QSize:
+        return QSize(self.content_width(), self.height())
+
+    def changeEvent(self, event):
+        # Шрифт из таблицы стилей применяется после создания, ширины кусков нужно пересчитать
+        if event.type() == QEvent.FontChange: # type: ignore
+            self.buffer.remeasure()
+            self.update_width()
+        super().changeEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect = event.rect()
+        painter.fillRect(rect, QColor("white"))
+
+        painter.setPen(QColor("black"))
+        height = self.height() - self.padding_top
+        if not self.buffer:
+            painter.drawText(QRect(self.padding_left, self.padding_top, self.width(), height),
+                             Qt.AlignLeft | Qt.AlignVCenter, self.placeholder) # type: ignore
+            return
+
+        # Рисуем только куски, попадающие в перерисовываемую (видимую) область
+        left = rect.left() - self.padding_left
+        right = rect.right() - self.padding_left
+        for offset, chunk in self.buffer.visible(left, right):
+            painter.drawText(QRect(self.padding_left + offset, self.padding_top, self.width(), height),
+                             Qt.AlignLeft | Qt.AlignVCenter, chunk) # type: ignore
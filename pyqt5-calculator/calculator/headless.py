@@ -0,0 +1,39 @@
+from calculator_logic import Evaluator
+from numeric_backends import create_backend
+from profiling import profile
+from typing import Iterable, TextIO
+import sys
+
+def evaluate_lines(lines: Iterable[str], evaluator: Evaluator, output: TextIO):
+    """ Вычисляет выражения построчно и печатает результаты (без графического интерфейса) """
+    for line in lines:
+        expression = line.strip()
+        if not expression:
+            continue
+        try:
+            result = evaluator.format(evaluator.evaluate(expression))
+        except ZeroDivisionError:
+            result = "Деление на ноль."
+        except IndexError:
+            result = "Незакрытая скобка."
+        except Exception:
+            result = "Ошибка в выражении"
+        output.write(f"{result}\n")
+
+def main(expressions: list[str], show_stats: bool = False, mode: str = "float", precision: int = 28,
+         show_profile: bool = False):
+    """
+    Вычисляет выражения из аргументов, а если их нет - из стандартного ввода
+    С show_profile печатает в stderr сводку времени, токенов, глубины и памяти по этапам вычисления
+    """
+    evaluator = Evaluator(backend=create_backend(mode, precision))
+    if show_profile:
+        with profile(evaluator, track_allocations=True) as profiler:
+            evaluate_lines(expressions or sys.stdin, evaluator, sys.stdout)
+        profiler.report(sys.stderr)
+    else:
+        evaluate_lines(expressions or sys.stdin, evaluator, sys.stdout)
+    if show_stats:
+        stats = evaluator.cache_stats()
+        for name, values in stats.items():
+            print(f"{name}: {values}", file=sys.stderr)
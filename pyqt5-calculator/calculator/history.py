@@ -0,0 +1,207 @@
+from bisect import bisect_left, insort
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import io
+import threading
+import time
+
+# Запись истории: (выражение, результат)
+Entry = Tuple[str, str]
+
+class History():
+    """
+    История вычислений в локальном файле, в который записи только дописываются
+    Файл читается лениво (при первом обращении или в фоне), поэтому запуск не зависит от размера истории
+    Пока файл не загружен, последние записи для листания берутся из хвоста файла без ожидания загрузки
+    Поиск по префиксу идет по отсортированному списку выражений, поиск подстроки - по индексу триграмм;
+    оба индекса строятся при первом поиске, а не при загрузке
+    """
+    default_path = Path.home() / ".pyqt5-calculator" / "history.tsv"
+    tail_bytes = 64 * 1024 # Сколько байт с конца файла читать для листания до загрузки
+    load_chunk = 1000 # Строк за один шаг загрузки
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else self.default_path
+        self.entries: List[Entry] = []
+        self.latest: Dict[str, int] = {} # выражение -> номер его последней записи
+        self.expressions: List[str] = [] # различные выражения, номер выражения - id для индекса триграмм
+        self.sorted_expressions: List[str] = []
+        self.trigrams: Dict[str, List[int]] = {}
+        self.indexed = 0 # Сколько выражений уже в индексах поиска
+
+        self.lock = threading.Lock()
+        self.index_lock = threading.Lock()
+        self.loaded = threading.Event()
+        self.loading = False
+        self.pending: List[Entry] = [] # записи, добавленные во время загрузки
+        self.tail: Optional[List[Entry]] = None # последние записи для листания, пока история не загружена
+        self.load_error: Optional[Exception] = None # Ошибка чтения файла при загрузке, если она была
+
+    def add(self, expression: str, result: str):
+        """ Дописывает запись в файл и, если история уже загружена, в память """
+        with self.lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as file:
+                    file.write(f"{expression}\t{result}\n")
+            except OSError:
+                pass # История не должна мешать вычислениям, запись остается только в памяти
+            if self.loaded.is_set():
+                self.append(expression, result)
+            elif self.loading:
+                self.pending.append((expression, result))
+            if self.tail is not None:
+                self.tail.append((expression, result))
+
+    def start_loading(self) -> Optional[int]:
+        """
+        Отмечает начало загрузки и запоминает размер файла под той же блокировкой, что и add:
+        все, что add допишет после этого, попадет в pending и не будет прочитано из файла второй раз
+        Возвращает None, если загрузка уже идет или закончена
+        """
+        with self.lock:
+            if self.loading or self.loaded.is_set():
+                return None
+            self.loading = True
+            try:
+                return self.path.stat().st_size
+            except OSError:
+                return 0 # Файла еще нет (или он недоступен) - загружать нечего
+
+    def load_async(self):
+        """ Загружает историю в фоновом потоке """
+        size = self.start_loading()
+        if size is not None:
+            threading.Thread(target=self.load, args=(size,), daemon=True).start()
+
+    def ensure_loaded(self):
+        """ Дожидается загрузки истории, при необходимости загружает ее сама """
+        if self.loaded.is_set():
+            return
+        size = self.start_loading()
+        if size is not None:
+            self.load(size)
+        self.loaded.wait()
+
+    @staticmethod
+    def parse(lines: Iterable[bytes]) -> Iterator[Entry]:
+        for line in lines:
+            expression, _, result = line.decode("utf-8", errors="replace").rstrip("\r\n").partition("\t")
+            if expression:
+                yield expression, result
+
+    def load(self, size: int):
+        """ Читает первые size байт файла (размер на момент start_loading), остальное придет через pending """
+        try:
+            if size:
+                with open(self.path, "rb") as file:
+                    data = file.read(size)
+                # Разбираем построчно, а не целиком: между шагами по load_chunk строк фоновый поток отдает GIL
+                for count, (expression, result) in enumerate(self.parse(io.BytesIO(data)), 1):
+                    self.append(expression, result)
+                    if count % self.load_chunk == 0:
+                        time.sleep(0)
+        except Exception as error:
+            # Без файла история начинается с того, что успели прочитать, но ожидающие загрузку не должны зависнуть
+            self.load_error = error
+        finally:
+            with self.lock:
+                for expression, result in self.pending:
+                    self.append(expression, result)
+                self.pending.clear()
+                self.tail = None # Дальше листание идет по загруженным записям
+                self.loading = False
+                self.loaded.set()
+
+    def read_tail(self) -> List[Entry]:
+        """ Читает последние записи из конца файла (не больше tail_bytes) """
+        try:
+            with open(self.path, "rb") as file:
+                size = file.seek(0, 2)
+                start = max(0, size - self.tail_bytes)
+                file.seek(start)
+                data = file.read()
+        except OSError:
+            return []
+        if start:
+            data = data[data.find(b"\n") + 1:] # Первая строка обрезана посередине
+        return list(self.parse(io.BytesIO(data)))
+
+    def recent(self, offset: int) -> Optional[Entry]:
+        """
+        Возвращает offset-ю запись с конца (1 - последняя) без ожидания загрузки
+        До окончания загрузки доступны только записи из хвоста файла; None, если записи нет
+        """
+        with self.lock:
+            if self.loaded.is_set():
+                entries = self.entries
+            else:
+                if self.tail is None:
+                    self.tail = self.read_tail()
+                entries = self.tail
+            return entries[-offset] if 0 < offset <= len(entries) else None
+
+    def append(self, expression: str, result: str):
+        """ Добавляет запись в память; индексы поиска достраиваются при следующем поиске """
+        self.entries.append((expression, result))
+        if expression not in self.latest:
+            self.expressions.append(expression)
+        self.latest[expression] = len(self.entries) - 1
+
+    def ensure_indexed(self):
+        """ Загружает историю и добавляет в индексы поиска выражения, появившиеся после прошлого поиска """
+        self.ensure_loaded()
+        with self.index_lock:
+            with self.lock:
+                new = self.expressions[self.indexed:]
+            for expression_id, expression in enumerate(new, self.indexed):
+                for trigram in {expression[i:i+3] for i in range(len(expression) - 2)}:
+                    self.trigrams.setdefault(trigram, []).append(expression_id)
+            if len(new) > 1:
+                # Одна сортировка вместо вставки каждого выражения
+                self.sorted_expressions.extend(new)
+                self.sorted_expressions.sort()
+            elif new:
+                insort(self.sorted_expressions, new[0])
+            self.indexed += len(new)
+
+    def __len__(self) -> int:
+        self.ensure_loaded()
+        return len(self.entries)
+
+    def get(self, position: int) -> Entry:
+        """ Возвращает запись по номеру за O(1), отрицательные номера считаются с конца """
+        self.ensure_loaded()
+        return self.entries[position]
+
+    def search_prefix(self, prefix: str, limit: int = 20) -> List[Entry]:
+        """ Возвращает последние записи выражений, начинающихся с prefix """
+        self.ensure_indexed()
+        found = []
+        i = bisect_left(self.sorted_expressions, prefix)
+        while i < len(self.sorted_expressions) and len(found) < limit:
+            expression = self.sorted_expressions[i]
+            if not expression.startswith(prefix):
+                break
+            found.append(self.entries[self.latest[expression]])
+            i += 1
+        return found
+
+    def search_substring(self, query: str, limit: int = 20) -> List[Entry]:
+        """ Возвращает записи выражений, содержащих query (сначала недавно появившиеся выражения) """
+        self.ensure_indexed()
+        if len(query) < 3:
+            candidates = range(self.indexed - 1, -1, -1)
+        else:
+            # Перебираем только выражения из самого короткого списка триграмм запроса
+            postings = [self.trigrams.get(query[i:i+3], []) for i in range(len(query) - 2)]
+            candidates = reversed(min(postings, key=len))
+
+        found = []
+        for expression_id in candidates:
+            expression = self.expressions[expression_id]
+            if query in expression:
+                found.append(self.entries[self.latest[expression]])
+                if len(found) >= limit:
+                    break
+        return found
@@ -0,0 +1,163 @@
+from calculator_logic import CalculatorLogic
+from numeric_backends import FloatBackend
+from typing import Any, List, Optional
+
+# Режимы разбора после очередного символа
+EXPECT_OPERAND = 0 # начало выражения, после "(", "*" или "/"
+IN_NUMBER = 1 # вводится число
+AFTER_CLOSE = 2 # только что закрыта скобка
+AFTER_SIGN = 3 # после числа или скобки идет цепочка знаков "+"/"-"
+
+class LiveState():
+    """
+    Неизменяемый снимок состояния разбора после очередного нажатия
+    Хранит частично вычисленные сумму и произведение текущей скобки и ссылку на внешнюю скобку
+    """
+    __slots__ = (
+        "parent", "mode", "total", "add_op", "term", "mul_op",
+        "number", "sign", "signs", "operand", "plain", "invalid"
+    )
+
+    def __init__(self, parent=None, mode=EXPECT_OPERAND, total=None, add_op=None, term=None, mul_op=None,
+                 number="", sign=1, signs="", operand=None, plain=True, invalid=False):
+        self.parent: Optional[LiveState] = parent
+        self.mode = mode
+        self.total = total
+        self.add_op = add_op
+        self.term = term
+        self.mul_op = mul_op
+        self.number: str = number
+        self.sign: int = sign
+        self.signs: str = signs # цепочка знаков, сворачивается так же, как в CalculatorLogic.normalize
+        self.operand = operand
+        self.plain: bool = plain
+        self.invalid: bool = invalid
+
+    def copy(self, **changes) -> "LiveState":
+        state = LiveState.__new__(LiveState)
+        for name in LiveState.__slots__:
+            setattr(state, name, changes.get(name, getattr(self, name)))
+        return state
+
+class LiveEvaluator():
+    """
+    Инкрементально разбирает выражение по мере ввода, чтобы показывать промежуточный результат
+    Каждое нажатие и удаление символа - O(1), предпросмотр - O(глубины скобок)
+    Окончательный результат по-прежнему считает Evaluator по кнопке "="
+    """
+    digits = "0123456789."
+
+    def __init__(self, backend=None):
+        self.backend = backend or FloatBackend()
+        self.states: List[LiveState] = [LiveState()]
+
+    def reset(self, text: str = ""):
+        """ Сбрасывает состояние и, если нужно, заново вводит текст одним символом ввода """
+        self.states = [LiveState()]
+        if text:
+            self.push(text)
+
+    def push(self, symbol: str):
+        """ Добавляет символ ввода (кнопку или целый результат прошлого вычисления) """
+        state = self.states[-1]
+        for char in symbol:
+            state = self.step(state, char)
+        self.states.append(state)
+
+    def pop(self):
+        """ Отменяет последний символ ввода """
+        if len(self.states) > 1:
+            self.states.pop()
+
+    def step(self, state: LiveState, char: str) -> LiveState:
+        """ Возвращает новое состояние после одного символа """
+        if state.invalid:
+            return state
+        try:
+            return self.transition(state, char)
+        except (ArithmeticError, ValueError):
+            return state.copy(invalid=True)
+
+    def transition(self, state: LiveState, char: str) -> LiveState:
+        mode = state.mode
+        operators = self.backend.operators
+
+        if char in self.digits:
+            if mode == IN_NUMBER:
+                return state.copy(number=state.number + char)
+            if mode == EXPECT_OPERAND:
+                # Знаки перед числом допустимы, только если они сворачиваются в унарный минус
+                unary = CalculatorLogic.normalize(state.signs)
+                if unary not in ("", "-"):
+                    return state.copy(invalid=True)
+                return state.copy(mode=IN_NUMBER, number=char, sign=-1 if unary else 1, signs="")
+            if mode == AFTER_SIGN:
+                # Первый знак свернутой цепочки - бинарная операция, остаток - унарный минус
+                folded = CalculatorLogic.normalize(state.signs)
+                if folded[1:] not in ("", "-"):
+                    return state.copy(invalid=True)
+                return state.copy(mode=IN_NUMBER, number=char, sign=-1 if folded[1:] else 1, signs="",
+                                  add_op=operators[folded[0]])
+            return state.copy(invalid=True)
+
+        if char in "+-":
+            if mode in (IN_NUMBER, AFTER_CLOSE):
+                total = self.fold_sum(state, self.fold_product(state, self.operand(state)))
+                return state.copy(mode=AFTER_SIGN, total=total, term=None, mul_op=None,
+                                  number="", operand=None, sign=1, signs=char, plain=False)
+            return state.copy(signs=state.signs + char)
+
+        if char in "*/":
+            if mode not in (IN_NUMBER, AFTER_CLOSE):
+                return state.copy(invalid=True)
+            term = self.fold_product(state, self.operand(state))
+            return state.copy(mode=EXPECT_OPERAND, term=term, mul_op=operators[char],
+                              number="", operand=None, sign=1, signs="", plain=False)
+
+        if char == "(":
+            folded = CalculatorLogic.normalize(state.signs)
+            if mode == AFTER_SIGN and len(folded) == 1:
+                state = state.copy(add_op=operators[folded], signs="")
+            elif mode != EXPECT_OPERAND or folded:
+                return state.copy(invalid=True)
+            return LiveState(parent=state, plain=False)
+
+        if char == ")":
+            if mode not in (IN_NUMBER, AFTER_CLOSE) or state.parent is None:
+                return state.copy(invalid=True)
+            value = self.fold_sum(state, self.fold_product(state, self.operand(state)))
+            return state.parent.copy(mode=AFTER_CLOSE, operand=value, plain=False)
+
+        return state.copy(invalid=True)
+
+    def operand(self, state: LiveState) -> Any:
+        """ Возвращает значение последнего завершенного операнда """
+        if state.mode == AFTER_CLOSE:
+            return state.operand
+        return self.backend.number(("-" if state.sign < 0 else "") + state.number)
+
+    @staticmethod
+    def fold_product(state: LiveState, value: Any) -> Any:
+        return state.mul_op(state.term, value) if state.mul_op else value
+
+    @staticmethod
+    def fold_sum(state: LiveState, value: Any) -> Any:
+        return state.add_op(state.total, value) if state.add_op else value
+
+    def preview(self) -> Optional[Any]:
+        """
+        Возвращает промежуточный результат или None, если его нечего показать
+        Незакрытые скобки считаются закрытыми в конце выражения
+        """
+        state = self.states[-1]
+        if state.invalid or state.plain or state.mode not in (IN_NUMBER, AFTER_CLOSE):
+            return None
+        try:
+            value = self.fold_sum(state, self.fold_product(state, self.operand(state)))
+            state = state.parent
+            while state is not None:
+                value = self.fold_sum(state, self.fold_product(state, value))
+                state = state.parent
+        except (ArithmeticError, ValueError):
+            return None
+        return value
@@ -0,0 +1,53 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+class LRUCache():
+    """
+    Ограниченный по размеру кэш с вытеснением давно не использованных записей
+    Ведет статистику попаданий и промахов
+    """
+    def __init__(self, maxsize: int = 128):
+        if maxsize < 0:
+            raise ValueError("Размер кэша не может быть отрицательным")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.data: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """ Возвращает значение по ключу и помечает запись как недавно использованную """
+        try:
+            value = self.data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        """ Сохраняет значение, при переполнении вытесняет самую старую запись """
+        if self.maxsize == 0:
+            return
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def clear(self):
+        """ Очищает кэш и сбрасывает статистику """
+        self.data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def stats(self) -> Dict[str, int]:
+        """ Возвращает статистику кэша """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.data),
+            "maxsize": self.maxsize
+        }
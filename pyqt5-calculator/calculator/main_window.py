@@ -1,36 +1,58 @@
 from PyQt5.QtWidgets import QMainWindow, QLabel, QWidget, QGridLayout, QVBoxLayout, QScrollArea
-from PyQt5.QtCore import Qt, QCoreApplication
-from PyQt5.QtGui import QIcon
+from PyQt5.QtWidgets import QApplication, QShortcut
+from PyQt5.QtCore import Qt, QCoreApplication, QTimer
+from PyQt5.QtGui import QIcon, QKeySequence
 from pathlib import Path
 from styles import Styles
 from button_grid import ButtonGrid
-from calculator_logic import CalculatorLogic
+from calculator_logic import Evaluator
+from expression_display import ExpressionDisplay
+from live_evaluator import LiveEvaluator
+from history import History
 import os
 
 class MainWindow(QMainWindow):
     """ Создает окно приложения """
-    def __init__(self):
+    def __init__(self, backend=None, live_preview: bool = True, history: History | None = None):
         super().__init__()
-        self.setGeometry(680, 400, 320, 480)
-        self.setFixedSize(320, 480)
-        self.setStyleSheet(Styles.window_style)
+        self.setGeometry(680, 400, 320, 504)
+        self.setFixedSize(320, 504)
+
+        # Таблица стилей разбирается один раз на все приложение, а не для каждого виджета
+        app = QApplication.instance()
+        if app and app.styleSheet() != Styles.application_style: # type: ignore
+            app.setStyleSheet(Styles.application_style) # type: ignore
 
         # Настройка названия окна
         self.setWindowTitle("Calculator")
         self.setWindowIconText("Calculator")
-        QCoreApplication.setApplicationName("Calculator")
-
-        # Настройка иконки окна
-        icon_path = os.path.join(Path(__file__).parent, "icon.png")
-        self.setWindowIcon(QIcon(icon_path))
 
         self.user_input = []
+        self.evaluator = Evaluator(backend=backend) # Вычисляет выражения и кэширует результаты
+        self.live = LiveEvaluator(self.evaluator.backend) if live_preview else None # Промежуточный результат при вводе
+        self.history = history or History() # История вычислений, файл читается в фоне после запуска
+        self.history_position = None # Номер просматриваемой записи истории с конца (1 - последняя)
         self.main_widget = QWidget() # Создаем главный виджет
 
         self.setup_main_window() # Подготавливаем элементы окна
 
         self.setCentralWidget(self.main_widget) # Указываем виджет как центральный
 
+        QTimer.singleShot(0, self.finish_setup) # Невидимую при запуске настройку откладываем на после первого кадра
+
+    def finish_setup(self):
+        """ Завершает настройку окна, не влияющую на первый кадр """
+        QCoreApplication.setApplicationName("Calculator")
+
+        # Настройка иконки окна
+        icon_path = os.path.join(Path(__file__).parent, "icon.png")
+        self.setWindowIcon(QIcon(icon_path))
+
+        # Стрелки вверх/вниз листают историю вычислений
+        QShortcut(QKeySequence(Qt.Key_Up), self, self.recall_previous) # type: ignore
+        QShortcut(QKeySequence(Qt.Key_Down), self, self.recall_next) # type: ignore
+        self.history.load_async()
+
     def setup_main_window(self):
         """ Подготавливает элементы окна """
         # Создаем главный холст
@@ -42,14 +64,20 @@ class MainWindow(QMainWindow):
         self.scroll_area = QScrollArea()
         self.scroll_area.setFixedHeight(80)
         self.scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff) # type: ignore
-        self.scroll_area.setStyleSheet(Styles.scroll_area_style)
+        self.scroll_area.setObjectName("display")
         
         # Поле вывода выражения и его результата
-        self.text = QLabel("Введите пример..")
+        self.text = ExpressionDisplay("Введите пример..")
         self.text.setFixedHeight(75)
         self.scroll_area.setWidget(self.text)
         main_layout.addWidget(self.scroll_area)
 
+        # Поле промежуточного результата
+        self.preview = QLabel("")
+        self.preview.setFixedHeight(24)
+        self.preview.setObjectName("preview")
+        main_layout.addWidget(self.preview)
+
         # Сетка кнопок
         grid_layout = QGridLayout()
         grid_layout.setContentsMargins(0, 0, 0, 0)
@@ -62,10 +90,16 @@ class MainWindow(QMainWindow):
     def on_button_click(self, symbol: str):
         """ Обрабатывает нажатие цифровых кнопок и операторов """
         self.user_input.append(symbol)
-        display_text = ''.join(self.user_input)
-        self.text.setText(display_text)
-        self.text.setMinimumWidth(self.text.fontMetrics().boundingRect(display_text).width() + 30)
+        self.text.append(symbol) # Перемеряется только хвост выражения, а не вся строка
         self.scroll_to_end()
+        if self.live:
+            self.live.push(symbol)
+            self.update_preview()
+
+    def update_preview(self):
+        """ Показывает промежуточный результат вводимого выражения """
+        value = self.live.preview() if self.live else None
+        self.preview.setText("" if value is None else f"= {self.evaluator.format(value)}")
 
     def scroll_to_end(self):
         """ Прокручивает поле прокрутки до конца """
@@ -73,42 +107,28 @@ class MainWindow(QMainWindow):
         scroll_bar.setValue(scroll_bar.maximum())  # type: ignore
 
     def update_scroll_size(self):
-        """ Обновляет размер поля прокрутки """
-        self.scroll_area.setMinimumWidth(self.text.sizeHint().width() + 30)
+        """ Обновляет размер поля вывода внутри области прокрутки """
+        self.text.update_width()
 
     def on_equal(self):
         """ 
         Обрабатывает нажатие кнопки "="
         1. Подгатавливает выражение
-        2. При помощи класса CalculatorLogic получает результат выражения
+        2. При помощи класса Evaluator получает результат выражения (или берет его из кэша)
         3. Обновляет текст на дисплее
         """
         try:
-            remove_chars = " []',"
-            translation_table = str.maketrans('', '', remove_chars)
-            s = str(self.user_input).translate(translation_table)
-
-            s = s.replace('--', '+').replace('+-', '-').replace('-+', '-').replace('++', '+')
-
-            for char in "+-*/()":
-                s = s.replace(char, f' {char} ')
-            
-            tokens = s.split()
-
-            i = 0
-            while i < len(tokens):
-                if tokens[i] == '-' and (i == 0 or tokens[i-1] in '+-*/(') and i+1 < len(tokens):
-                    tokens[i+1] = '-' + tokens[i+1]
-                    del tokens[i]
-                else:
-                    i += 1
-
-            recourse = CalculatorLogic()
-            self.result = recourse.a(tokens)
-            result_str = str(round(self.result, 2))
-            self.text.setText(result_str)
+            expression = ''.join(self.user_input)
+            self.result = self.evaluator.evaluate(expression)
+            result_str = self.evaluator.format(self.result)
+            self.history.add(expression, result_str)
+            self.history_position = None
+            self.text.set_text(result_str)
             self.user_input.clear()
             self.user_input.append(result_str)
+            if self.live:
+                self.live.reset(result_str)
+            self.update_preview()
             self.update_scroll_size()
             self.scroll_to_end()
         
@@ -125,9 +145,14 @@ class MainWindow(QMainWindow):
         Удаляет поледний символ
         """
         if self.user_input:
-            self.user_input.pop(-1)
-            display_text = ''.join(self.user_input)
-            self.text.setText(display_text if display_text else "Введите пример..")
+            removed = self.user_input.pop(-1)
+            if self.user_input:
+                self.text.remove(len(removed))
+            else:
+                self.text.set_placeholder("Введите пример..")
+            if self.live:
+                self.live.pop()
+            self.update_preview()
         else:
             self.clear_input()
         self.update_scroll_size()
@@ -138,5 +163,41 @@ class MainWindow(QMainWindow):
         Полностью очищает экран
         """
         self.user_input.clear()
-        self.text.setText(str(message))
-        self.update_scroll_size()
\ No newline at end of file
+        self.text.set_placeholder(str(message))
+        if self.live:
+            self.live.reset()
+        self.update_preview()
+        self.update_scroll_size()
+
+    def set_input(self, text: str):
+        """ Заменяет вводимое выражение (например, записью из истории) """
+        self.user_input = list(text)
+        self.text.set_text(text)
+        if self.live:
+            self.live.reset()
+            for char in text:
+                self.live.push(char)
+        self.update_preview()
+        self.update_scroll_size()
+        self.scroll_to_end()
+
+    def recall_previous(self):
+        """ Подставляет в поле ввода предыдущую запись истории (не дожидаясь загрузки всего файла) """
+        offset = 1 if self.history_position is None else self.history_position + 1
+        entry = self.history.recent(offset)
+        if entry is None:
+            return
+        self.history_position = offset
+        self.set_input(entry[0])
+
+    def recall_next(self):
+        """ Подставляет в поле ввода следующую запись истории, после последней - очищает ввод """
+        if self.history_position is None:
+            return
+        entry = self.history.recent(self.history_position - 1)
+        if entry is not None:
+            self.history_position -= 1
+            self.set_input(entry[0])
+        else:
+            self.history_position = None
+            self.clear_input()
\ No newline at end of file
@@ -0,0 +1,83 @@
+from fractions import Fraction
+import decimal
+import operator
+
+class FloatBackend():
+    """ Быстрый режим вычислений на float, результат округляется до 2 знаков """
+    name = "float"
+
+    def __init__(self):
+        self.operators = {
+            "+": operator.add,
+            "-": operator.sub,
+            "*": operator.mul,
+            "/": operator.truediv
+        }
+
+    def number(self, token: str) -> float:
+        return float(token)
+
+    def format(self, value: float) -> str:
+        return str(round(value, 2))
+
+class DecimalBackend():
+    """ Точный десятичный режим с настраиваемой точностью """
+    name = "decimal"
+
+    def __init__(self, precision: int = 28):
+        # Ошибки деления и переполнения превращаем в исключения, как у float
+        self.context = decimal.Context(
+            prec=precision,
+            traps=[decimal.InvalidOperation, decimal.DivisionByZero, decimal.Overflow]
+        )
+        self.operators = {
+            "+": self.context.add,
+            "-": self.context.subtract,
+            "*": self.context.multiply,
+            "/": self.divide
+        }
+
+    def divide(self, left: decimal.Decimal, right: decimal.Decimal) -> decimal.Decimal:
+        # 0/0 в decimal - InvalidOperation, а не деление на ноль, поэтому проверяем сами
+        if not right:
+            raise ZeroDivisionError("division by zero")
+        return self.context.divide(left, right)
+
+    def number(self, token: str) -> decimal.Decimal:
+        return self.context.create_decimal(token)
+
+    def format(self, value: decimal.Decimal) -> str:
+        return format(value.normalize(self.context), "f")
+
+class FractionBackend():
+    """ Режим рациональных дробей без потери точности """
+    name = "fraction"
+
+    def __init__(self):
+        self.operators = {
+            "+": operator.add,
+            "-": operator.sub,
+            "*": operator.mul,
+            "/": operator.truediv
+        }
+
+    def number(self, token: str) -> Fraction:
+        return Fraction(token)
+
+    def format(self, value: Fraction) -> str:
+        # Дробь "a/b" снова является корректным выражением для калькулятора
+        return str(value)
+
+backends = {
+    "float": FloatBackend,
+    "decimal": DecimalBackend,
+    "fraction": FractionBackend
+}
+
+def create_backend(mode: str = "float", precision: int = 28):
+    """ Создает вычислительный режим по его названию """
+    if mode not in backends:
+        raise ValueError(f"Неизвестный режим вычислений: {mode}")
+    if mode == "decimal":
+        return DecimalBackend(precision)
+    return backends[mode]()
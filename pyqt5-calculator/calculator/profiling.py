@@ -0,0 +1,191 @@
+from calculator_logic import Program, Stages
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+import tracemalloc
+import time
+
+# Этапы вычисления в порядке выполнения
+STAGES = ("normalize", "tokenize", "unary", "parse", "evaluate")
+
+class StageRecord():
+    """
+    Замер одного этапа: время, размер в токенах, глубина и выделенная память
+    Глубина у parse - наибольшая вложенность скобок, замеренная самим разбором, у evaluate - глубина стека
+    """
+    __slots__ = ("name", "seconds", "tokens", "depth", "allocated")
+
+    def __init__(self, name: str, seconds: float, tokens: int = 0, depth: int = 0, allocated: int = 0):
+        self.name = name
+        self.seconds = seconds
+        self.tokens = tokens
+        self.depth = depth
+        self.allocated = allocated # пик выделенной за этап памяти в байтах, 0 без tracemalloc
+
+class EvaluationProfile():
+    """ Замеры всех этапов одного вычисления """
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.stages: List[StageRecord] = []
+        self.cache = "" # "result", если результат взят из кэша
+
+    @property
+    def seconds(self) -> float:
+        return sum(stage.seconds for stage in self.stages)
+
+    def describe(self) -> str:
+        """ Однострочное описание для лога """
+        parts = [f"{stage.name} {stage.seconds * 1000:.3f} мс" for stage in self.stages]
+        cache = f" (кэш: {self.cache})" if self.cache else ""
+        return f"{self.seconds * 1000:.3f} мс{cache}: " + ", ".join(parts)
+
+class StageTotals():
+    """ Накопленная статистика одного этапа по всем вычислениям, без хранения отдельных замеров """
+    __slots__ = ("count", "total", "max", "max_tokens", "max_depth", "max_allocated")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.max_tokens = 0
+        self.max_depth = 0
+        self.max_allocated = 0
+
+    def add(self, record: StageRecord):
+        self.count += 1
+        self.total += record.seconds
+        self.max = max(self.max, record.seconds)
+        self.max_tokens = max(self.max_tokens, record.tokens)
+        self.max_depth = max(self.max_depth, record.depth)
+        self.max_allocated = max(self.max_allocated, record.allocated)
+
+def stack_depth(program: Program) -> int:
+    """ Наибольшая глубина стека при выполнении программы """
+    depth = deepest = 0
+    for op, _ in program:
+        depth += 1 if op is None else -1
+        deepest = max(deepest, depth)
+    return deepest
+
+class StageRecorder(Stages):
+    """ Этапы одного вычисления Evaluator с замером времени, размера, глубины и памяти """
+    def __init__(self, profiler: "Profiler", evaluator, profile: EvaluationProfile):
+        self.profiler = profiler
+        self.evaluator = evaluator
+        self.profile = profile
+
+    def run(self, name: str, function: Callable, argument: Any) -> Any:
+        tracing = self.profiler.track_allocations and tracemalloc.is_tracing()
+        base = 0
+        if tracing:
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+
+        start = time.perf_counter()
+        result = function(argument)
+        seconds = time.perf_counter() - start
+
+        allocated = tracemalloc.get_traced_memory()[1] - base if tracing else 0
+        tokens, depth = self.measure(name, argument, result)
+        self.profile.stages.append(StageRecord(name, seconds, tokens, depth, allocated))
+        return result
+
+    def measure(self, name: str, argument: Any, result: Any) -> Tuple[int, int]:
+        """ Размер в токенах и глубина этапа (вне замера времени) """
+        match name:
+            case "tokenize" | "unary":
+                return len(result), 0
+            case "parse":
+                return len(argument), self.evaluator.logic.max_nesting
+            case "evaluate":
+                return len(argument), stack_depth(argument)
+        return 0, 0
+
+    def cached(self):
+        self.profile.cache = "result"
+
+    def finish(self):
+        self.profiler.finish(self.profile)
+
+class Profiler():
+    """
+    Замеряет этапы вычислений Evaluator: нормализацию, разбиение на токены, присоединение унарных минусов,
+    разбор и выполнение программы
+    Подключается к Evaluator через attach (или контекстный менеджер profile): Evaluator.evaluate выполняет
+    свои этапы через StageRecorder вместо Stages без замеров, сам путь вычисления остается одним
+    """
+    def __init__(self, track_allocations: bool = False, on_profile: Optional[Callable[[EvaluationProfile], None]] = None,
+                 keep: bool = False):
+        self.track_allocations = track_allocations
+        self.on_profile = on_profile # вызывается после каждого вычисления
+        self.keep = keep # хранить ли отдельные замеры в profiles; сводке они не нужны
+        self.profiles: List[EvaluationProfile] = []
+        self.totals: Dict[str, StageTotals] = {name: StageTotals() for name in STAGES}
+        self.evaluations = 0
+        self.cached = 0
+        self.started_tracing = False
+
+    def attach(self, evaluator):
+        evaluator.profiler = self
+        if self.track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+
+    def detach(self, evaluator):
+        evaluator.profiler = None
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def begin(self, evaluator, expression: str) -> "StageRecorder":
+        """ Вызывается Evaluator.evaluate в начале вычисления, этапы пойдут через возвращенный объект """
+        return StageRecorder(self, evaluator, EvaluationProfile(expression))
+
+    def finish(self, profile: EvaluationProfile):
+        """ Добавляет замеры вычисления в сводку; память сводки не растет с числом вычислений """
+        self.evaluations += 1
+        if profile.cache:
+            self.cached += 1
+        for record in profile.stages:
+            self.totals[record.name].add(record)
+        if self.keep:
+            self.profiles.append(profile)
+        if self.on_profile:
+            self.on_profile(profile)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """ Сводка по этапам всех вычислений """
+        summary = {}
+        for name, totals in self.totals.items():
+            if not totals.count:
+                continue
+            summary[name] = {
+                "count": totals.count,
+                "total": totals.total,
+                "mean": totals.total / totals.count,
+                "max": totals.max,
+                "max_tokens": totals.max_tokens,
+                "max_depth": totals.max_depth,
+                "max_allocated": totals.max_allocated,
+            }
+        return summary
+
+    def report(self, output: TextIO):
+        """ Печатает сводку таблицей """
+        output.write(f"вычислений: {self.evaluations}, из кэша: {self.cached}\n")
+        output.write(f"{'этап':<11}{'раз':>8}{'всего, мс':>12}{'сред, мкс':>12}{'макс, мкс':>12}"
+                     f"{'токенов':>10}{'глубина':>10}{'память, Б':>12}\n")
+        for name, stats in self.summary().items():
+            output.write(f"{name:<11}{stats['count']:>8}{stats['total'] * 1000:>12.3f}{stats['mean'] * 1e6:>12.2f}"
+                         f"{stats['max'] * 1e6:>12.2f}{stats['max_tokens']:>10}{stats['max_depth']:>10}"
+                         f"{stats['max_allocated']:>12}\n")
+
+@contextmanager
+def profile(evaluator, track_allocations: bool = False,
+            on_profile: Optional[Callable[[EvaluationProfile], None]] = None, keep: bool = False) -> Iterator[Profiler]:
+    """ Подключает Profiler к Evaluator на время блока with """
+    profiler = Profiler(track_allocations, on_profile, keep)
+    profiler.attach(evaluator)
+    try:
+        yield profiler
+    finally:
+        profiler.detach(evaluator)
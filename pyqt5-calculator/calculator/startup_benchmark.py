@@ -0,0 +1,62 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+def child():
+    """ Запускает окно и печатает время от старта процесса до первого кадра """
+    start = time.perf_counter()
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QObject, QEvent
+    from main_window import MainWindow
+    imported = time.perf_counter()
+
+    class FirstPaint(QObject):
+        """ Ловит первое событие отрисовки окна и завершает цикл событий """
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint and not hasattr(self, "painted"): # type: ignore
+                self.painted = time.perf_counter()
+                app.quit()
+            return False
+
+    app = QApplication(sys.argv[:1])
+    window = MainWindow()
+    first_paint = FirstPaint()
+    window.installEventFilter(first_paint)
+    window.show()
+    app.exec_()
+
+    print(f"{(imported - start) * 1000:.2f} {(first_paint.painted - start) * 1000:.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Время до первого кадра калькулятора (платформа offscreen)")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    imports, frames, totals = [], [], []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child"],
+            env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.split()
+        totals.append((time.perf_counter() - start) * 1000)
+        imports.append(float(output[-2]))
+        frames.append(float(output[-1]))
+
+    for name, values in (("импорт PyQt и модулей", imports), ("до первого кадра", frames), ("процесс целиком", totals)):
+        print(f"{name:<24} медиана {statistics.median(values):8.2f} мс   мин {min(values):8.2f} мс")
+
+if __name__ == "__main__":
+    main()
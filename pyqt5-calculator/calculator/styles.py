@@ -1,8 +1,16 @@
 class Styles:
-    window_style = "background-color: #ffffff;"
+    """
+    Таблица стилей приложения. Разбирается Qt один раз на уровне QApplication,
+    виджеты выбирают оформление через objectName и динамическое свойство "variant"
+    """
+    window_style = """
+        QMainWindow {
+            background-color: #ffffff;
+        }
+        """
 
     white_button_style = """
-        QPushButton {
+        QPushButton[variant="white"] {
             background-color: #ffffff;
             color: black;
             border-radius: 10px;
@@ -10,13 +18,13 @@ class Styles:
             font-size: 18px;
             font-weight: bold;
         }
-        QPushButton:pressed {
+        QPushButton[variant="white"]:pressed {
             background-color: #f6f6f6;
         }
         """
     
     orange_button_style = """
-        QPushButton {
+        QPushButton[variant="orange"] {
             background-color: #ff8e00;
             color: white;
             border-radius: 10px;
@@ -24,36 +32,46 @@ class Styles:
             font-size: 18px;
             font-weight: bold;
         }
-        QPushButton:pressed {
+        QPushButton[variant="orange"]:pressed {
             background-color: #f18600;
         }
         """
     
     scroll_area_style = """
-        QLabel {
-            font-size: 20px; 
-            padding-top: 7px;
+        ExpressionDisplay {
+            font-size: 20px;
             background-color: white;
-            qproperty-alignment: 'AlignLeft | AlignVCenter';
         }
-        QScrollArea { 
+        QScrollArea#display {
             border: none; 
             background-color: white;
             height: 80px;
         }
-        QScrollBar:horizontal {
+        QScrollArea#display QScrollBar:horizontal {
             border: none;
             background: #f0f0f0;
             height: 12px;
             margin: 5px 0px 0px 0px;  /* Отступ снизу */
             border-radius: 6px;
         }
-        QScrollBar::handle:horizontal {
+        QScrollArea#display QScrollBar::handle:horizontal {
             background: #c0c0c0;
             min-width: 30px;
             border-radius: 6px;
         }
-        QScrollBar::add-line:horizontal, QScrollBar::sub-line:horizontal {
+        QScrollArea#display QScrollBar::add-line:horizontal, QScrollArea#display QScrollBar::sub-line:horizontal {
             background: none;
         }
-        """
\ No newline at end of file
+        """
+
+    preview_style = """
+        QLabel#preview {
+            font-size: 14px;
+            color: #8a8a8a;
+            background-color: white;
+            padding-right: 10px;
+            qproperty-alignment: 'AlignRight | AlignVCenter';
+        }
+        """
+
+    application_style = window_style + white_button_style + orange_button_style + scroll_area_style + preview_style
@@ -0,0 +1,87 @@
+from bisect import bisect_right
+from typing import Callable, Iterator, List, Tuple
+
+class ChunkedText():
+    """
+    Текст, разбитый на куски фиксированного размера, с закэшированной шириной каждого куска
+    Добавление и удаление символов в конце перемеряет только последний кусок
+    """
+    def __init__(self, measure: Callable[[str], int], chunk_size: int = 128):
+        self.measure = measure
+        self.chunk_size = chunk_size
+        self.chunks: List[str] = []
+        self.widths: List[int] = []
+        self.offsets: List[int] = [] # x-координата начала каждого куска
+        self.length = 0
+
+    @property
+    def width(self) -> int:
+        """ Общая ширина текста """
+        if not self.chunks:
+            return 0
+        return self.offsets[-1] + self.widths[-1]
+
+    def __len__(self) -> int:
+        return self.length
+
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+    def clear(self):
+        self.chunks.clear()
+        self.widths.clear()
+        self.offsets.clear()
+        self.length = 0
+
+    def append(self, text: str):
+        """ Добавляет текст в конец, дописывая последний кусок и при необходимости создавая новые """
+        while text:
+            if self.chunks and len(self.chunks[-1]) < self.chunk_size:
+                free = self.chunk_size - len(self.chunks[-1])
+                chunk = self.chunks[-1] + text[:free]
+                self.chunks[-1] = chunk
+                self.widths[-1] = self.measure(chunk)
+            else:
+                chunk = text[:self.chunk_size]
+                self.offsets.append(self.width)
+                self.chunks.append(chunk)
+                self.widths.append(self.measure(chunk))
+                free = len(chunk)
+            self.length += min(free, len(text))
+            text = text[free:]
+
+    def remove(self, count: int):
+        """ Удаляет count последних символов """
+        while count > 0 and self.chunks:
+            chunk = self.chunks[-1]
+            if count >= len(chunk):
+                self.chunks.pop()
+                self.widths.pop()
+                self.offsets.pop()
+                removed = len(chunk)
+            else:
+                chunk = chunk[:-count]
+                self.chunks[-1] = chunk
+                self.widths[-1] = self.measure(chunk)
+                removed = count
+            self.length -= removed
+            count -= removed
+
+    def remeasure(self):
+        """ Заново измеряет все куски (например, после смены шрифта) """
+        offset = 0
+        for i, chunk in enumerate(self.chunks):
+            self.offsets[i] = offset
+            self.widths[i] = self.measure(chunk)
+            offset += self.widths[i]
+
+    def tail_offset(self) -> int:
+        """ x-координата начала последнего куска - все, что правее, могло измениться """
+        return self.offsets[-1] if self.chunks else 0
+
+    def visible(self, left: int, right: int) -> Iterator[Tuple[int, str]]:
+        """ Возвращает (x-координата, кусок) только для кусков, пересекающих отрезок [left, right] """
+        i = max(bisect_right(self.offsets, left) - 1, 0)
+        while i < len(self.chunks) and self.offsets[i] <= right:
+            yield self.offsets[i], self.chunks[i]
+            i += 1
@@ -1,8 +1,9 @@
 from PyQt5.QtWidgets import QApplication, QMainWindow, QPushButton, QLabel, QVBoxLayout, QWidget
-from PyQt5.QtWidgets import QGridLayout, QLineEdit
+from PyQt5.QtWidgets import QLineEdit
 from PyQt5 import QtWidgets
-from PyQt5.QtWebSockets import QWebSocket
-from PyQt5.QtCore import Qt, QUrl, QTimer
+from PyQt5.QtCore import Qt, QTimer, QThread, QMetaObject, Q_ARG
+from network import GameState, NetworkWorker
+from board_widget import BoardWidget
 from styles import GameStyles
 import sys
 import json
@@ -92,27 +93,27 @@ class Game:
             self.state = "finished"
 
 class WidgetFactory:
-    """ Класс для удобного создания виджетов """
-    def create_button(self, text: str, size, style, on_click=None) -> QPushButton:
+    """
+    Класс для удобного создания виджетов
+    Стили берутся из общей таблицы стилей приложения по свойству variant
+    """
+    def create_button(self, text: str, size, variant: str, on_click=None) -> QPushButton:
         button = QPushButton(text)
         button.setFixedSize(*size)
-        button.setStyleSheet(style)
+        button.setProperty("variant", variant)
         if on_click:
             button.clicked.connect(on_click)
         return button
     
-    def create_label(self, text: str, style, font_size=None) -> QLabel:
+    def create_label(self, text: str, variant: str) -> QLabel:
         label = QLabel(text)
-        label.setStyleSheet(style)
-        if isinstance(font_size, int):
-            label.setStyleSheet("font-size: {font_size}px;".replace("{font_size}", str(font_size)))
+        label.setProperty("variant", variant)
         return label
     
-    def create_line_edit(self, placeholder: str, size, style) -> QLineEdit:
+    def create_line_edit(self, placeholder: str, size) -> QLineEdit:
         line_edit = QLineEdit()
         line_edit.setPlaceholderText(placeholder)
         line_edit.setFixedSize(*size)
-        line_edit.setStyleSheet(style)
         return line_edit
 
 class Window(QMainWindow):
@@ -121,38 +122,49 @@ class Window(QMainWindow):
         super().__init__()
         self.setWindowTitle("Tic Tac Toe")
         self.setFixedSize(700, 700)
-        self.setStyleSheet(GameStyles.background_style)
+
+        # Таблица стилей разбирается один раз на все приложение, а не для каждого виджета
+        app = QApplication.instance()
+        if app and app.styleSheet() != GameStyles.application_style: # type: ignore
+            app.setStyleSheet(GameStyles.application_style) # type: ignore
 
         # Используем QStackedWidget для переключения между экранами
         self.stack = QtWidgets.QStackedWidget()
         self.setCentralWidget(self.stack)
 
-        # Создаем экраны
-        self.menu_widget = QWidget()
-        self.game_widget = QWidget()
-        self.retry_menu_widget = QWidget()
-        self.online_menu_widget = QWidget()
-        
-        # Добавляем их в стак для переключения
-        self.stack.addWidget(self.menu_widget)
-        self.stack.addWidget(self.game_widget)
-        self.stack.addWidget(self.retry_menu_widget)
-        self.stack.addWidget(self.online_menu_widget)
-
         self.factory = WidgetFactory()
-        
-        # Подгатавливаем виджеты для экранов
-        self.setup_menu()
-        self.setup_game()
-        self.setup_retry_menu()
 
-        self.setup_online_menu()
+        # Экраны создаются при первом переходе на них: имя -> метод подготовки
+        self.screens = {}
+        self.screen_setups = {
+            "menu": self.setup_menu,
+            "game": self.setup_game,
+            "retry_menu": self.setup_retry_menu,
+            "online_menu": self.setup_online_menu,
+        }
+
         self.online_game = None
+        self.latency_probe = None # Замер задержек (используется benchmark.py)
         self.saved_ip = None
         self.saved_game_id = None
         self.seved_player_name = None
         
-        self.stack.setCurrentWidget(self.menu_widget)
+        self.show_screen("menu")
+
+    def ensure_screen(self, name: str) -> QWidget:
+        """ Возвращает экран, при первом обращении создавая его и добавляя в стак """
+        widget = self.screens.get(name)
+        if widget is None:
+            widget = QWidget()
+            self.screens[name] = widget
+            setattr(self, f"{name}_widget", widget) # menu_widget, game_widget и т.д.
+            self.screen_setups[name]()
+            self.stack.addWidget(widget)
+        return widget
+
+    def show_screen(self, name: str):
+        """ Переключает на экран, создавая его при необходимости """
+        self.stack.setCurrentWidget(self.ensure_screen(name))
 
     def add_to_layout(self, layout: QVBoxLayout, widget, alignment=Qt.AlignCenter): # type: ignore
         layout.addWidget(widget, alignment=alignment)
@@ -162,15 +174,15 @@ class Window(QMainWindow):
         layout = QVBoxLayout() # Холст для виджетов
 
         # Заголовок меню
-        menu_title = self.factory.create_label("Выберите режим:", GameStyles.menu_title_style) 
+        menu_title = self.factory.create_label("Выберите режим:", "title")
         self.add_to_layout(layout, menu_title)
 
         # Кнопка локальной игры
-        local_game_button = self.factory.create_button("Локальная игра", GameStyles.menu_button_size, GameStyles.menu_button_style, self.on_local_game_click) 
+        local_game_button = self.factory.create_button("Локальная игра", GameStyles.menu_button_size, "menu", self.on_local_game_click)
         self.add_to_layout(layout, local_game_button)
 
         # Кнопка онлайн игры
-        online_game_button = self.factory.create_button("Онлайн игра", GameStyles.menu_button_size, GameStyles.menu_button_style, self.on_online_game_click) 
+        online_game_button = self.factory.create_button("Онлайн игра", GameStyles.menu_button_size, "menu", self.on_online_game_click)
         self.add_to_layout(layout, online_game_button)
 
         layout.addStretch() # Заполняем пустое пространство между краями экрана и виджетами
@@ -181,30 +193,21 @@ class Window(QMainWindow):
     def setup_game(self):
         """ Подготавливает меню для игры """
         main_layout = QVBoxLayout() # Холст для виджетов
-        self.grid_layout = QGridLayout() # Холст-сетка для игрового поля
-
-        # Выравниваем кнопки
-        self.grid_layout.setHorizontalSpacing(0) 
-        self.grid_layout.setVerticalSpacing(10) 
-    
-        self.grid_layout.setContentsMargins(80, 20, 80, 20) # Создаем отступы для содержимого
+        main_layout.setContentsMargins(80, 20, 80, 20) # Создаем отступы для содержимого
 
         # Текст для отображения состояния игры
-        self.game_label = self.factory.create_label("", GameStyles.game_label_style, 50)
+        self.game_label = self.factory.create_label("", "turn")
         self.add_to_layout(main_layout, self.game_label)
+
+        # Задержка связи с соперником в онлайн игре
+        self.latency_label = self.factory.create_label("", "substatus")
+        self.add_to_layout(main_layout, self.latency_label)
         
-        # Создаем кнопки игрового поля
-        self.buttons = []
-        for row in range(3):
-            for col in range(3):
-                btn = QPushButton()
-                btn.setFixedSize(*GameStyles.game_button_size)  
-                btn.setStyleSheet(GameStyles.game_button_style)
-                btn.clicked.connect(lambda _, r=row, c=col: self.on_cell_click(r, c))
-                self.grid_layout.addWidget(btn, row, col)
-                self.buttons.append(btn)
+        # Игровое поле - один виджет, который сам рисует клетки и сообщает, по какой кликнули
+        self.board_widget = BoardWidget()
+        self.board_widget.cell_clicked.connect(self.on_cell_click)
+        self.add_to_layout(main_layout, self.board_widget)
         
-        main_layout.addLayout(self.grid_layout) # Добавляем холст-сетку с игровым полем на главный холст
         self.game_widget.setLayout(main_layout) # Подготовка окончена, сохраняем
 
     def setup_retry_menu(self):
@@ -215,15 +218,15 @@ class Window(QMainWindow):
         main_layout.setContentsMargins(50, 125, 50, 275) # Создаем отступы для содержимого
         
         # Текст для отображения исхода игры
-        self.retry_label = self.factory.create_label("", GameStyles.menu_title_style, 25)
+        self.retry_label = self.factory.create_label("", "result")
         self.add_to_layout(main_layout, self.retry_label)
 
         # Кнопка играть заново
-        retry_button = self.factory.create_button("Играть заново", GameStyles.menu_button_size, GameStyles.menu_button_style, self.restart_game)
+        retry_button = self.factory.create_button("Играть заново", GameStyles.menu_button_size, "menu", self.restart_game)
         self.add_to_layout(main_layout, retry_button)
 
         # Кнопка вернуться в меню
-        back_to_menu_button = self.factory.create_button("Меню", GameStyles.menu_button_size, GameStyles.menu_button_style, self.back_to_menu)
+        back_to_menu_button = self.factory.create_button("Меню", GameStyles.menu_button_size, "menu", self.back_to_menu)
         self.add_to_layout(main_layout, back_to_menu_button)
         
         self.retry_menu_widget.setLayout(main_layout) # Подготовка окончена, сохраняем
@@ -236,31 +239,31 @@ class Window(QMainWindow):
         main_layout.setContentsMargins(50, 100, 50, 225) # Создаем отступы для содержимого
         
         # Текст, который отображает статус подключения
-        self.status = self.factory.create_label("", GameStyles.menu_title_style, 40)
+        self.status = self.factory.create_label("", "status")
         self.add_to_layout(main_layout, self.status)
 
         # Текст для дополнительной информации и ошибок
-        self.substatus = self.factory.create_label("", GameStyles.menu_title_style, 20)
+        self.substatus = self.factory.create_label("", "substatus")
         self.add_to_layout(main_layout, self.substatus)
 
         # Поле для ввода ip
-        self.server_ip_input = self.factory.create_line_edit("IP сервера", GameStyles.input_size, GameStyles.input_style)
+        self.server_ip_input = self.factory.create_line_edit("IP сервера", GameStyles.input_size)
         self.add_to_layout(main_layout, self.server_ip_input)
 
         # Поле для ввода ip комнаты
-        self.game_id_input = self.factory.create_line_edit("ID игры", GameStyles.input_size, GameStyles.input_style)
+        self.game_id_input = self.factory.create_line_edit("ID игры", GameStyles.input_size)
         self.add_to_layout(main_layout, self.game_id_input)
 
         # Поле для ввода имени игрока
-        self.nickname_input = self.factory.create_line_edit("Ваш ник", GameStyles.input_size, GameStyles.input_style)
+        self.nickname_input = self.factory.create_line_edit("Ваш ник", GameStyles.input_size)
         self.add_to_layout(main_layout, self.nickname_input)
 
         # Кнопка подключиться
-        connect_button = self.factory.create_button("Подключиться", GameStyles.menu_button_size, GameStyles.menu_button_style, self.on_connect_click)
+        connect_button = self.factory.create_button("Подключиться", GameStyles.menu_button_size, "menu", self.on_connect_click)
         self.add_to_layout(main_layout, connect_button)
 
         # Кнопка назад
-        back_to_menu_button = self.factory.create_button("Меню", GameStyles.menu_button_size, GameStyles.menu_button_style, self.back_to_menu)
+        back_to_menu_button = self.factory.create_button("Меню", GameStyles.menu_button_size, "menu", self.back_to_menu)
         self.add_to_layout(main_layout, back_to_menu_button)
 
         self.online_menu_widget.setLayout(main_layout) # Подготовка окончена, сохраняем
@@ -268,7 +271,6 @@ class Window(QMainWindow):
     def on_cell_click(self, y: int, x: int):
         """ Обрабатывает клик по клетке игрового поля """
         position = y*3 + x
-        btn = self.buttons[position] # Получаем кнопку по координатам
         
         # Если игра запущенна в онлайн режиме, то отправляем запрос о ходе, если нет, то делаем ход в локальной игре
         if self.online_game:
@@ -279,13 +281,12 @@ class Window(QMainWindow):
                 return
         
             # Игнорируем занятые клетки
-            if btn.text():
+            if self.board_widget.cell(position):
                 return
             
             # Обновляем UI и игровое состояние
             current_player = self.game.get_current_player()
-            btn.setText(current_player.symbol) 
-            btn.setStyleSheet(f"{GameStyles.game_button_style}".replace("{color}", current_player.color))
+            self.board_widget.set_cell(position, current_player.symbol)
         
             # Обновляем игровую логику
             if self.game.board.make_move(current_player, y, x):
@@ -304,26 +305,26 @@ class Window(QMainWindow):
         else:
             msg = f"Победил: {winner}"
         
+        self.show_screen("retry_menu")
         self.retry_label.setText(msg) # Отображаем результат игры
-        self.stack.setCurrentWidget(self.retry_menu_widget)  
     
     def on_local_game_click(self):
         """ Обрабатывает клик по кнопке создания локальной игры """
         self.game = Game(Player("O", GameStyles.color_O), Player("X", GameStyles.color_X))
+        self.show_screen("game")
         self.game_label.setText(f"Ход: {self.game.get_current_player().symbol}")
+        self.latency_label.setText("")
         self.clear_board()
-        self.stack.setCurrentWidget(self.game_widget)  
 
     def on_online_game_click(self):
         """ Обрабатывает клик по кнопке создания сетевой игры """
+        self.show_screen("online_menu")
         if self.saved_ip:
             self.server_ip_input.setText(self.saved_ip)
         if self.saved_game_id:
             self.game_id_input.setText(self.saved_game_id)
         if self.seved_player_name:
             self.nickname_input.setText(self.seved_player_name)
-            
-        self.stack.setCurrentWidget(self.online_menu_widget)
 
     def on_connect_click(self):
         """ Обрабатывает клик по кнопке подключения """
@@ -348,33 +349,24 @@ class Window(QMainWindow):
         self.status.setText("Connecting")
         self.substatus.setText("")
 
+        # Старый поток сети нужно остановить до того, как сборщик мусора удалит его объект
+        if self.online_game:
+            self.online_game.close()
         self.online_game = OnlineGame(self.saved_ip, self.saved_game_id, self.seved_player_name, self)
 
-        self.stack.setCurrentWidget(self.game_widget)
+        self.show_screen("game")
+        self.latency_label.setText("")
 
     def update_online_board(self, board: list, current_player: str):
         """ Метод для обновления доски онлайн игрой """
-        self.clear_board()
-        for i, symbol in enumerate(board):
-            btn = self.buttons[i]
-            if symbol == " ":
-                continue
-            btn.setText(symbol)
-            match symbol:
-                case "X":
-                    color = GameStyles.color_X
-                case "O":
-                    color = GameStyles.color_O
-                case _:
-                    color = GameStyles.color_neutral
-            btn.setStyleSheet(GameStyles.game_button_style.replace("{color}", color))
+        self.board_widget.set_cells(board)
 
         self.game_label.setText(f"Ход: {current_player}")
 
     def restart_game(self):
         """ Обрабатывает клик по кнопке играть заново """
         if self.online_game is None:
-            self.stack.setCurrentWidget(self.game_widget)
+            self.show_screen("game")
             self.on_local_game_click()
         else:
             # Пересоздаем подключение
@@ -382,110 +374,247 @@ class Window(QMainWindow):
             game_id = self.saved_game_id
             player_id = self.seved_player_name
             
+            # Если соединение живо, просто запрашиваем состояние нового раунда
+            if self.online_game.status == "Connected":
+                self.online_game.get_game_state()
+                self.show_screen("game")
+                return
+
             # Закрываем старое подключение
-            if self.online_game.websocket:
-                self.online_game.websocket.close()
+            self.online_game.close()
             
             # Создаем новое подключение
             self.online_game = OnlineGame(ip, game_id, player_id, self) # type: ignore
             self.clear_board()
-            self.stack.setCurrentWidget(self.game_widget)
+            self.show_screen("game")
 
     def back_to_menu(self):
         """ Обрабатывает клик по кнопке назад """
-        if self.online_game and self.online_game.websocket: 
-            self.online_game.websocket.close()
+        if self.online_game:
+            self.online_game.close()
         self.online_game = None
-        self.stack.setCurrentWidget(self.menu_widget)
+        self.show_screen("menu")
+
+    def closeEvent(self, event):
+        # Поток сети нужно остановить до удаления окна
+        if self.online_game:
+            self.online_game.close()
+        super().closeEvent(event)
 
     def clear_board(self):
         """ Очищает доску от старых символов и цветов """
-        for btn in self.buttons:
-            btn.setText("")
-            btn.setStyleSheet(GameStyles.game_button_style.replace("{color}", "black"))
+        self.board_widget.clear()
         
 class OnlineGame:
-    """ Класс, позволяющий создать онлайн игру """
+    """
+    Класс, позволяющий создать онлайн игру
+    Сеть и декодирование сообщений работают в отдельном потоке (NetworkWorker),
+    интерфейс получает через очередь сигналов уже готовые состояния, не чаще одного за кадр
+    """
+    pending_timeout = 3000 # мс, сколько показывать ход без ответа сервера
+
     def __init__(self, ip: str, game_id: str, player_name: str, window: Window):
         self.ip = ip
         self.game_id = game_id
         self.player_name = player_name 
-        self.websocket = QWebSocket()
         self.status = "Connecting"
         self.window = window
+        window.ensure_screen("online_menu") # Метки статуса находятся на экране подключения
         self.status_label = window.status
         self.sub_status_label = window.substatus
         self.game_active = True 
-
-        # Подключаем обработчики событий
-        self.websocket.connected.connect(self.on_connected)
-        self.websocket.disconnected.connect(self.on_disconnected)
-        self.websocket.textMessageReceived.connect(self.on_message)
-        self.websocket.error.connect(self.on_error)
+        self.probe = window.latency_probe
+
+        self.version = -1 # Версия последнего примененного состояния
+        self.board = [" "]*9 # Подтвержденное сервером поле
+        self.current_player = ""
+        self.game_state = ""
+        self.players = {} # имя -> символ
+        self.symbol = ""
+
+        # Ход, показанный до ответа сервера: (клетка, поле с этим ходом, следующий игрок, версия, к которой он отправлен)
+        self.pending_move = None
+        # Если ответа на ход нет слишком долго (ход мог потеряться при обрыве), предсказание снимается
+        self.pending_timer = QTimer()
+        self.pending_timer.setSingleShot(True)
+        self.pending_timer.timeout.connect(self.drop_pending_move)
+        self.closing = False # После закрытия запоздавшие сигналы воркера игнорируются
+
+        # Воркер переезжает в свой поток, сигналы из него доставляются в поток интерфейса через очередь
+        self.thread = QThread()
+        self.worker = NetworkWorker(ip, game_id, player_name)
+        self.worker.moveToThread(self.thread)
+        self.worker.status_changed.connect(self.on_status, Qt.QueuedConnection) # type: ignore
+        self.worker.session_started.connect(self.on_session, Qt.QueuedConnection) # type: ignore
+        self.worker.state_ready.connect(self.on_state, Qt.QueuedConnection) # type: ignore
+        self.worker.game_over.connect(self.on_game_over, Qt.QueuedConnection) # type: ignore
+        self.worker.move_rejected.connect(self.on_move_rejected, Qt.QueuedConnection) # type: ignore
+        self.worker.rejected.connect(self.on_rejected, Qt.QueuedConnection) # type: ignore
+        self.worker.latency_changed.connect(self.on_latency, Qt.QueuedConnection) # type: ignore
+        self.thread.started.connect(self.worker.start)
+        self.thread.finished.connect(self.worker.deleteLater)
         
         # Подключение
-        url = QUrl(f"ws://{ip}/ws/{game_id}/{player_name}")
-        self.websocket.open(url)
-    
-    def on_connected(self):
-        self.set_connection_status("Connected")
-        self.set_sub_status("")
-        self.window.stack.setCurrentWidget(self.window.game_widget)
-        self.get_game_state()
+        self.thread.start()
+
+    def close(self):
+        """ Намеренно закрывает соединение без переподключения и останавливает поток сети """
+        self.closing = True
+        self.stop_network()
+
+    def stop_network(self):
+        """ Останавливает поток сети; вызывается и когда соединение закончилось без переподключения """
+        self.pending_timer.stop()
+        if self.thread.isRunning():
+            QMetaObject.invokeMethod(self.worker, "close", Qt.BlockingQueuedConnection) # type: ignore
+            self.thread.quit()
+            self.thread.wait()
+
+    def on_status(self, status: str, sub_status: str):
+        if self.closing:
+            return
+        self.set_connection_status(status)
+        self.set_sub_status(sub_status)
+        match status:
+            case "Connected":
+                self.window.show_screen("game")
+            case "Disconnected" | "Error":
+                # Воркер больше не переподключается - поток ему не нужен
+                self.stop_network()
+                self.window.show_screen("online_menu")
+
+    def on_session(self, symbol: str):
+        self.symbol = symbol
+        # Сессия началась заново или возобновилась: неизвестно, дошел ли до сервера показанный ход,
+        # поэтому показываем только подтвержденное поле, а ход игрок сделает еще раз
+        self.drop_pending_move()
+
+    def drop_pending_move(self):
+        """ Снимает показанный заранее ход и возвращает подтвержденное сервером поле """
+        self.pending_timer.stop()
+        if self.pending_move is None or self.closing:
+            self.pending_move = None
+            return
+        self.pending_move = None
+        self.window.update_online_board(self.board, self.current_player)
 
-    def on_disconnected(self):
+    def on_state(self, state: GameState):
+        if self.closing:
+            return
+        probe = self.probe
+        if probe:
+            probe.mark("receive", at=state.received_at)
+            probe.mark("decode", at=state.decoded_at)
+        self.version = state.version
+        self.board = state.board
+        self.apply_server_state(state)
+        if probe:
+            probe.mark("apply", state)
+        self.game_active = True
+
+    def on_game_over(self, data: dict):
+        if self.closing:
+            return
+        winner = data["winner"]
+        if winner == "draw":
+            self.window.show_game_result("draw")
+        else:
+            self.window.show_game_result(winner)
+
+        self.game_active = False
+        if self.probe:
+            self.probe.mark("game_over", data)
+
+        QTimer.singleShot(2000, self.get_game_state)
+
+    def on_move_rejected(self):
+        # Сервер не принял ход, который уже показан: возвращаем подтвержденное поле
+        if self.closing:
+            return
+        self.drop_pending_move()
+
+    def on_rejected(self, error_msg: str):
+        # Сервер отказал в подключении, переподключаться бессмысленно
+        if self.closing:
+            return
+        self.stop_network()
         self.set_connection_status("Disconnected")
-        self.set_sub_status("Соединение разорвано")
-        self.window.stack.setCurrentWidget(self.window.online_menu_widget)
-
-    def on_message(self, message: str):
-        try:
-            data = json.loads(message)
-            match data["type"]:
-                case "state":
-                    self.window.update_online_board(data["board"], data["current_player"])
-
-                    if not self.game_active:
-                        self.game_active = True
-                    
-                case "game_over":
-                    winner = data["winner"]
-                    if winner == "draw":
-                        self.window.show_game_result("draw")
-                    else:
-                        self.window.show_game_result(winner)
-                    
-                    self.game_active = False
-                    
-                    QTimer.singleShot(2000, self.get_game_state)
-                    
-                case "error":
-                    error_msg = data["error"]
-                    self.set_sub_status(error_msg)
-                    self.window.stack.setCurrentWidget(self.window.online_menu_widget)
-                case _:
-                    print(f"Unknown message type: {data['type']}")
-        except Exception as e:
-            print(f"Error processing message: {e}")
-
-    def on_error(self, error: str):
-        self.set_connection_status("Error")
-        self.set_sub_status(str(error))
-        self.window.stack.setCurrentWidget(self.window.online_menu_widget)
+        self.set_sub_status(error_msg)
+        self.window.show_screen("online_menu")
+
+    def on_latency(self, players: dict):
+        """ Показывает задержку соперника и свою по замерам сервера """
+        if self.closing:
+            return
+        opponent = next((name for name in players if name != self.player_name), None)
+        parts = []
+        if opponent is not None:
+            rtt = players[opponent]
+            parts.append(f"Пинг соперника: {rtt:.0f} мс" if rtt is not None else "Пинг соперника: -")
+        if players.get(self.player_name) is not None:
+            parts.append(f"ваш: {players[self.player_name]:.0f} мс")
+        self.window.latency_label.setText(", ".join(parts))
+
+    def apply_server_state(self, state: GameState):
+        """ Сверяет показанный заранее ход с состоянием от сервера и отображает итоговое поле """
+        self.current_player = state.current_player
+        self.game_state = state.state
+        self.players = state.players
+
+        if self.pending_move:
+            position, predicted, opponent, version = self.pending_move
+            # Ход еще не обработан сервером - продолжаем показывать его, пока состояние не изменилось
+            # Любая новая версия означает, что сервер уже ответил на ход или потерял его
+            if state.version == version and self.board[position] == " " and self.game_state == "in game" and self.current_player == self.player_name:
+                self.window.update_online_board(predicted, opponent)
+                return
+            self.pending_move = None
+            self.pending_timer.stop()
+
+        self.window.update_online_board(self.board, self.current_player)
+
+    def predict_move(self, y: int, x: int) -> bool:
+        """
+        Проверяет ход по локальной копии поля (классы Board/Player клиента) и сразу показывает его
+        Сервер остается главным: его состояние заменит предсказание, а отказ откатит его
+        """
+        if self.pending_move or self.game_state != "in game" or self.current_player != self.player_name or not self.symbol:
+            return False
+
+        board = Board()
+        board.cells = list(self.board)
+        if not board.make_move(Player(self.symbol, GameStyles.color_neutral), x, y):
+            return False
+
+        opponent = next((name for name in self.players if name != self.player_name), "")
+        self.pending_move = (x + y*3, board.get_board(), opponent, self.version)
+        self.pending_timer.start(self.pending_timeout)
+        self.window.update_online_board(board.get_board(), opponent)
+        return True
 
     def make_move(self, y: int, x: int):
+        # Неверный ход не отправляем вовсе, верный показываем сразу, не дожидаясь сервера
+        if self.symbol and not self.predict_move(y, x):
+            return
         message = json.dumps({
                 "type": "make_move",
                 "y": y,
                 "x": x
             })
-        self.websocket.sendTextMessage(message)
+        if self.probe:
+            self.probe.mark("send")
+        self.send(message)
 
     def get_game_state(self):
         message = json.dumps({
             "type": "get_state",
         })
-        self.websocket.sendTextMessage(message)
+        self.send(message)
+
+    def send(self, message: str):
+        """ Передает сообщение в поток сети """
+        if not self.closing and self.thread.isRunning():
+            QMetaObject.invokeMethod(self.worker, "send", Qt.QueuedConnection, Q_ARG(str, message)) # type: ignore
 
     def set_connection_status(self, status: str):
         self.status = status
@@ -0,0 +1,186 @@
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QObject, QEvent, QTimer
+from pathlib import Path
+import importlib.util
+import argparse
+import random
+import socket
+import subprocess
+import sys
+import time
+import os
+
+client_path = Path(__file__).parent / "__main__.py"
+server_dir = Path(__file__).parent.parent / "server"
+
+def load_client():
+    """ Загружает модуль клиента (__main__.py) под другим именем, чтобы не запускать main() """
+    sys.path.insert(0, str(client_path.parent))
+    spec = importlib.util.spec_from_file_location("client", client_path)
+    module = importlib.util.module_from_spec(spec) # type: ignore
+    spec.loader.exec_module(module) # type: ignore
+    return module
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+class LatencyProbe(QObject):
+    """
+    Замеряет этапы хода от клика до отрисовки: отправка, получение ответа, декодирование,
+    применение к доске и первая отрисовка окна после применения
+    """
+    def __init__(self, window, on_state=None, on_game_over=None):
+        super().__init__()
+        self.window = window
+        self.on_state = on_state
+        self.on_game_over = on_game_over
+        self.current = None # Замер текущего хода: этап -> время
+        self.samples = []
+
+    def mark(self, stage: str, data=None, at: float | None = None):
+        """ Отмечает этап; at - время, замеренное раньше в потоке сети (получение и декодирование) """
+        now = time.perf_counter() if at is None else at
+        current = self.current
+        match stage:
+            case "send":
+                self.current = {"send": now}
+            case "receive":
+                if current is not None and "receive" not in current:
+                    current["receive"] = now
+            case "decode":
+                if current is not None and "decode" not in current:
+                    current["decode"] = now
+            case "apply":
+                if current is not None and "decode" in current and "apply" not in current:
+                    current["apply"] = now
+                if self.on_state:
+                    self.on_state(data)
+            case "game_over":
+                if self.on_game_over:
+                    self.on_game_over(data)
+
+    def eventFilter(self, obj, event):
+        current = self.current
+        if (current is not None and "apply" in current and event.type() == QEvent.Paint # type: ignore
+                and obj.isWidgetType() and obj.window() is self.window):
+            current["repaint"] = time.perf_counter()
+            self.samples.append(current)
+            self.current = None
+        return False
+
+class ScriptedPlayer():
+    """ Игрок, который делает случайные ходы кликами по окну клиента """
+    def __init__(self, client, name: str, rng: random.Random, think_ms: int):
+        self.window = client.Window()
+        self.name = name
+        self.rng = rng
+        self.think_ms = think_ms
+        self.acted_version = None
+        self.probe = LatencyProbe(self.window, self.on_state, self.on_game_over)
+        self.window.latency_probe = self.probe
+        self.window.show()
+
+    def connect(self, address: str, game_id: str):
+        self.window.ensure_screen("online_menu")
+        self.window.server_ip_input.setText(address)
+        self.window.game_id_input.setText(game_id)
+        self.window.nickname_input.setText(self.name)
+        self.window.on_connect_click()
+
+    def on_state(self, state):
+        if state.state != "in game" or state.current_player != self.name:
+            return
+        if state.version == self.acted_version:
+            return
+        self.acted_version = state.version
+
+        free = [i for i, cell in enumerate(self.window.online_game.board) if cell == " "]
+        if free:
+            position = self.rng.choice(free)
+            QTimer.singleShot(self.think_ms, lambda: self.window.on_cell_click(position // 3, position % 3))
+
+    def on_game_over(self, data: dict):
+        # Не ждем 2 секунды клиента, сразу запрашиваем состояние нового раунда
+        QTimer.singleShot(0, self.window.online_game.get_game_state)
+
+def start_server(port: int) -> subprocess.Popen:
+    """ Запускает локальный сервер и ждет, пока он начнет принимать соединения """
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "__server__:app", "--port", str(port), "--log-level", "warning"],
+        cwd=server_dir
+    )
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Сервер не запустился")
+
+def main():
+    parser = argparse.ArgumentParser(description="Задержка от клика до отрисовки в онлайн игре (платформа offscreen)")
+    parser.add_argument("--moves", type=int, default=300, help="количество замеренных ходов")
+    parser.add_argument("--server", help="адрес уже запущенного сервера host:port")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--think-ms", type=int, default=0, help="пауза перед ходом")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=int, default=120, help="секунд на весь замер")
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    server = None if args.server else start_server(args.port)
+    address = args.server or f"127.0.0.1:{args.port}"
+
+    try:
+        app = QApplication(sys.argv[:1])
+        client = load_client()
+        rng = random.Random(args.seed)
+        players = [ScriptedPlayer(client, name, rng, args.think_ms) for name in ("bench_a", "bench_b")]
+        for player in players:
+            app.installEventFilter(player.probe)
+
+        def check_done():
+            if sum(len(p.probe.samples) for p in players) >= args.moves:
+                app.quit()
+
+        done_timer = QTimer()
+        done_timer.timeout.connect(check_done)
+        done_timer.start(50)
+        QTimer.singleShot(args.timeout * 1000, app.quit)
+
+        game_id = str(rng.randint(10**6, 10**7))
+        for player in players:
+            player.connect(address, game_id)
+        app.exec_()
+        for player in players:
+            if player.window.online_game:
+                player.window.online_game.close()
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    samples = [s for p in players for s in p.probe.samples]
+    if not samples:
+        print("Нет замеров: проверьте, что сервер доступен")
+        return
+
+    stages = [
+        ("сеть + сервер", "send", "receive"),
+        ("декодирование", "receive", "decode"),
+        ("передача + применение", "decode", "apply"),
+        ("отрисовка", "apply", "repaint"),
+        ("итого", "send", "repaint"),
+    ]
+    print(f"ходов: {len(samples)}")
+    print(f"{'этап':<24}{'p50, мс':>10}{'p90, мс':>10}{'p99, мс':>10}{'max, мс':>10}")
+    for name, start, end in stages:
+        values = [(s[end] - s[start]) * 1000 for s in samples]
+        print(f"{name:<24}{percentile(values, 50):>10.3f}{percentile(values, 90):>10.3f}"
+              f"{percentile(values, 99):>10.3f}{max(values):>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtGui import QColor, QFont, QPainter, QPen
+from PyQt5.QtCore import Qt, QRect, pyqtSignal
+from typing import List, Optional
+from styles import GameStyles
+
+class BoardWidget(QWidget):
+    """
+    Игровое поле одним виджетом: сетка и символы рисуются в paintEvent, клетка клика находится по координатам
+    При обновлении перерисовываются только изменившиеся клетки, поэтому смена состояния не трогает
+    стили и не зависит от размера поля
+    """
+    cell_clicked = pyqtSignal(int, int) # строка, столбец
+
+    def __init__(self, size: int = 3, cell_size: int = GameStyles.board_cell_size,
+                 spacing: int = GameStyles.board_spacing, parent: Optional[QWidget] = None):
+        super().__init__(parent)
+        self.board_size = size
+        self.cell_size = cell_size
+        self.spacing = spacing
+        self.cells: List[str] = [""] * (size * size) # Символы клеток, "" - пустая клетка
+        self.hovered = -1 # Клетка под курсором
+        self.pressed = -1 # Клетка, на которой нажали кнопку мыши
+
+        self.colors = {"O": QColor(GameStyles.color_O), "X": QColor(GameStyles.color_X), "": QColor(GameStyles.color_neutral)}
+        self.symbol_font = QFont()
+        self.symbol_font.setPixelSize(GameStyles.board_font_size)
+        self.symbol_font.setBold(True)
+
+        side = size * cell_size + (size - 1) * spacing
+        self.setFixedSize(side, side)
+        self.setMouseTracking(True) # Подсветка клетки под курсором без нажатия
+        self.setAttribute(Qt.WA_OpaquePaintEvent) # type: ignore # Фон рисуем сами, Qt не нужно его очищать
+
+    def cell_rect(self, index: int) -> QRect:
+        row, col = divmod(index, self.board_size)
+        step = self.cell_size + self.spacing
+        return QRect(col * step, row * step, self.cell_size, self.cell_size)
+
+    def cell_at(self, x: int, y: int) -> int:
+        """ Возвращает номер клетки по координатам в виджете или -1, если точка в промежутке между клетками """
+        step = self.cell_size + self.spacing
+        col, col_offset = divmod(x, step)
+        row, row_offset = divmod(y, step)
+        if not (0 <= col < self.board_size and 0 <= row < self.board_size) or col_offset >= self.cell_size or row_offset >= self.cell_size:
+            return -1
+        return row * self.board_size + col
+
+    def cell(self, index: int) -> str:
+        return self.cells[index]
+
+    def set_cell(self, index: int, symbol: str):
+        symbol = symbol.strip()
+        if self.cells[index] != symbol:
+            self.cells[index] = symbol
+            self.update(self.cell_rect(index))
+
+    def set_cells(self, symbols: List[str]):
+        """ Показывает поле целиком (" " и "" - пустая клетка), перерисовывая только изменившиеся клетки """
+        for index, symbol in enumerate(symbols):
+            self.set_cell(index, symbol)
+
+    def clear(self):
+        self.set_cells([""] * len(self.cells))
+
+    def set_hovered(self, index: int):
+        if index != self.hovered:
+            for old in (self.hovered, index):
+                if old >= 0:
+                    self.update(self.cell_rect(old))
+            self.hovered = index
+
+    def mouseMoveEvent(self, event):
+        self.set_hovered(self.cell_at(event.x(), event.y()))
+
+    def leaveEvent(self, event):
+        self.set_hovered(-1)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton: # type: ignore
+            self.pressed = self.cell_at(event.x(), event.y())
+
+    def mouseReleaseEvent(self, event):
+        # Как у кнопки: клик засчитывается, если кнопку мыши отпустили над той же клеткой
+        if event.button() == Qt.LeftButton and self.pressed >= 0: # type: ignore
+            index = self.cell_at(event.x(), event.y())
+            if index == self.pressed:
+                self.cell_clicked.emit(*divmod(index, self.board_size))
+        self.pressed = -1
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing) # type: ignore
+        painter.fillRect(event.rect(), Qt.white) # type: ignore
+        painter.setFont(self.symbol_font)
+        border = QPen(QColor("#333"), 2)
+        for index, symbol in enumerate(self.cells):
+            rect = self.cell_rect(index)
+            if not event.rect().intersects(rect):
+                continue
+            painter.setPen(border)
+            painter.setBrush(QColor("#f6f6f6") if index == self.hovered else Qt.white) # type: ignore
+            painter.drawRoundedRect(rect.adjusted(1, 1, -1, -1), 5, 5)
+            if symbol:
+                painter.setPen(self.colors.get(symbol, self.colors[""]))
+                painter.drawText(rect, Qt.AlignCenter, symbol) # type: ignore
+        painter.end()
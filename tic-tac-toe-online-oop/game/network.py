@@ -0,0 +1,214 @@
+from PyQt5.QtWebSockets import QWebSocket
+from PyQt5.QtCore import QObject, QTimer, QUrl, pyqtSignal, pyqtSlot
+from typing import Dict, List, Optional
+import random
+import time
+import json
+
+class GameState():
+    """ Состояние онлайн игры, уже декодированное и с примененными изменениями (delta) """
+    __slots__ = ("board", "current_player", "state", "winner", "version", "players", "received_at", "decoded_at")
+
+    def __init__(self, board: List[str], current_player: str, state: str, winner: str, version: int,
+                 players: Dict[str, str], received_at: float = 0.0, decoded_at: float = 0.0):
+        self.board = board
+        self.current_player = current_player
+        self.state = state
+        self.winner = winner
+        self.version = version
+        self.players = players # имя -> символ
+        self.received_at = received_at # время получения и декодирования последнего сообщения (для замеров)
+        self.decoded_at = decoded_at
+
+class NetworkWorker(QObject):
+    """
+    Сетевая часть онлайн игры, работает в отдельном потоке (QThread)
+    Владеет веб-сокетом, декодирует сообщения, применяет изменения к своей копии поля
+    и передает в поток интерфейса готовые GameState не чаще одного раза за кадр
+    При обрыве связи переподключается с экспоненциальной задержкой и случайным разбросом,
+    а по токену сессии получает от сервера только пропущенные изменения
+    """
+    reconnect_base_delay = 0.5 # секунды
+    reconnect_max_delay = 10.0
+    reconnect_max_attempts = 8
+    frame_interval = 16 # мс, состояния чаще одного кадра объединяются в последнее
+
+    status_changed = pyqtSignal(str, str) # статус подключения, дополнительная информация
+    session_started = pyqtSignal(str) # символ игрока
+    state_ready = pyqtSignal(object) # GameState
+    game_over = pyqtSignal(object) # сообщение game_over
+    move_rejected = pyqtSignal()
+    rejected = pyqtSignal(str) # сервер отказал в подключении
+    latency_changed = pyqtSignal(object) # имя игрока -> сглаженный RTT в мс (None, если еще не измерен)
+
+    def __init__(self, ip: str, game_id: str, player_name: str):
+        super().__init__()
+        self.ip = ip
+        self.game_id = game_id
+        self.player_name = player_name
+        self.websocket: Optional[QWebSocket] = None
+
+        # Состояние для возобновления сессии
+        self.token = None
+        self.version = -1 # Последняя известная версия состояния игры
+        self.board = [" "]*9 # Подтвержденное сервером поле
+        self.players = {}
+
+        self.closing = False # Соединение закрыто намеренно, переподключаться не нужно
+        self.connected_once = False # Переподключаемся только если соединение уже было установлено
+        self.reconnect_attempt = 0
+        # Таймеры - дочерние объекты, поэтому переезжают в поток вместе с воркером,
+        # а их обработчики объявлены слотами, чтобы вызываться в потоке воркера
+        self.reconnect_timer = QTimer(self)
+        self.reconnect_timer.setSingleShot(True)
+        self.reconnect_timer.timeout.connect(self.reconnect)
+
+        self.pending_state: Optional[GameState] = None # Последнее еще не переданное состояние
+        self.last_emit = 0.0
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setSingleShot(True)
+        self.frame_timer.timeout.connect(self.flush_state)
+
+    @pyqtSlot()
+    def start(self):
+        """ Создает веб-сокет уже в потоке воркера и подключается """
+        self.websocket = QWebSocket(parent=self)
+        self.websocket.connected.connect(self.on_connected)
+        self.websocket.disconnected.connect(self.on_disconnected)
+        self.websocket.textMessageReceived.connect(self.on_message)
+        self.websocket.error.connect(self.on_error)
+        self.websocket.open(self.get_url())
+
+    def get_url(self) -> QUrl:
+        """ Адрес подключения, при возобновлении сессии с токеном и последней известной версией """
+        url = f"ws://{self.ip}/ws/{self.game_id}/{self.player_name}"
+        if self.token:
+            url += f"?token={self.token}&since={self.version}"
+        return QUrl(url)
+
+    @pyqtSlot(str)
+    def send(self, message: str):
+        if self.websocket:
+            self.websocket.sendTextMessage(message)
+
+    @pyqtSlot()
+    def close(self):
+        """ Намеренно закрывает соединение без переподключения """
+        self.closing = True
+        self.reconnect_timer.stop()
+        self.frame_timer.stop()
+        if self.websocket:
+            self.websocket.close()
+
+    def on_connected(self):
+        resumed = self.reconnect_attempt > 0 and self.token is not None
+        self.reconnect_attempt = 0
+        self.connected_once = True
+        self.status_changed.emit("Connected", "")
+        # При возобновлении сервер сам присылает пропущенные изменения
+        if not resumed:
+            self.send(json.dumps({"type": "get_state"}))
+
+    def on_disconnected(self):
+        if self.closing:
+            return
+        if self.connected_once and self.reconnect_attempt < self.reconnect_max_attempts:
+            self.schedule_reconnect()
+            return
+        self.status_changed.emit("Disconnected", "Соединение разорвано")
+
+    def schedule_reconnect(self):
+        """ Планирует переподключение: задержка растет экспоненциально, со случайным разбросом (full jitter) """
+        if self.reconnect_timer.isActive():
+            return
+        delay = random.uniform(0, min(self.reconnect_max_delay, self.reconnect_base_delay * 2 ** self.reconnect_attempt))
+        self.reconnect_attempt += 1
+        self.status_changed.emit("Reconnecting", f"Переподключение, попытка {self.reconnect_attempt}")
+        self.reconnect_timer.start(int(delay * 1000))
+
+    @pyqtSlot()
+    def reconnect(self):
+        if not self.closing and self.websocket:
+            self.websocket.open(self.get_url())
+
+    def on_error(self, error):
+        # Ошибка во время переподключения - пробуем еще раз, пока не кончатся попытки
+        if not self.closing and 0 < self.reconnect_attempt < self.reconnect_max_attempts:
+            self.schedule_reconnect()
+            return
+        self.status_changed.emit("Error", str(error))
+
+    def on_message(self, message: str):
+        received_at = time.perf_counter()
+        try:
+            data = json.loads(message)
+            decoded_at = time.perf_counter()
+            match data["type"]:
+                case "ping":
+                    # Отвечаем сразу из потока сети: занятый интерфейс не искажает замер сервера
+                    self.send(json.dumps({"type": "pong", "id": data["id"]}))
+
+                case "latency":
+                    self.latency_changed.emit(data["players"])
+
+                case "session":
+                    self.token = data["token"]
+                    self.session_started.emit(data.get("symbol", ""))
+
+                case "state":
+                    self.version = data.get("version", self.version)
+                    self.board = list(data["board"])
+                    self.queue_state(data, received_at, decoded_at)
+
+                case "delta":
+                    # Пропущенные за время обрыва ходы текущего раунда
+                    for position, symbol in data["moves"]:
+                        self.board[position] = symbol
+                    self.version = data["version"]
+                    self.queue_state(data, received_at, decoded_at)
+
+                case "game_over":
+                    # Последнее состояние должно дойти до интерфейса раньше результата
+                    self.flush_state()
+                    self.game_over.emit(data)
+
+                case "move_rejected":
+                    self.flush_state()
+                    self.move_rejected.emit()
+
+                case "error":
+                    # Сервер отказал в подключении, переподключаться бессмысленно
+                    self.closing = True
+                    self.rejected.emit(data["error"])
+                case _:
+                    print(f"Unknown message type: {data['type']}")
+        except Exception as e:
+            print(f"Error processing message: {e}")
+
+    def queue_state(self, data: dict, received_at: float, decoded_at: float):
+        """
+        Запоминает новое состояние и передает его сразу, если в этом кадре еще ничего не передавалось,
+        иначе - в конце кадра, заменив промежуточные состояния последним
+        """
+        self.players = data.get("players", self.players)
+        self.pending_state = GameState(
+            list(self.board), data["current_player"], data["state"], data.get("winner", ""),
+            self.version, dict(self.players), received_at, decoded_at
+        )
+        if self.frame_timer.isActive():
+            return
+        elapsed = (time.perf_counter() - self.last_emit) * 1000
+        if elapsed >= self.frame_interval:
+            self.flush_state()
+        else:
+            self.frame_timer.start(int(self.frame_interval - elapsed) + 1)
+
+    @pyqtSlot()
+    def flush_state(self):
+        self.frame_timer.stop()
+        if self.pending_state is None:
+            return
+        state = self.pending_state
+        self.pending_state = None
+        self.last_emit = time.perf_counter()
+        self.state_ready.emit(state)
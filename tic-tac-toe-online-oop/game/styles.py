@@ -1,61 +1,57 @@
 class GameStyles():
     menu_button_size= (250, 65)
     input_size = (300, 40)
-    game_button_size = (160, 160)
+    board_cell_size = 160
+    board_spacing = 10
+    board_font_size = 50 # px
 
     color_O = "blue"
     color_X = "red"
     color_neutral = "black"
 
-    background_style = "background-color: white;"
+    # Правила ниже выбирают виджеты по динамическому свойству variant
+    # Игровое поле (BoardWidget) рисуется само и в таблице стилей не участвует
+    background_style = """
+        QWidget {
+            background-color: white;
+        }
+    """
 
-    menu_title_style = """
+    label_style = """
+        QLabel[variant="title"] {
             font-size: 25px;
             font-weight: bold;
-        """
-    
-    menu_button_style = """
-            QPushButton {
-                font-size: 15px;
-                font-weight: bold;
-                margin-top: 10px;
-                border: 3px solid #de8400;
-                background-color: #ff9800;
-                color: white;
-                border-radius: 5px;
-            }
-            QPushButton:hover {
-                font-size: 15px;
-                font-weight: bold;
-                margin-top: 10px;
-                border: 3px solid #cd7a00;
-                background-color: #f49100;
-                color: white;
-                border-radius: 5px;
-            }
-        """
-    
-    game_label_style = """
+        }
+        QLabel[variant="turn"] {
             font-size: 50px;
-            margin-bottom: 0px;
-        """
-    
-    game_button_style = """
-            QPushButton {
-                font-size: 50px;
-                font-weight: bold;
-                border: 2px solid #333;
-                background: white;
-                color: {color};
-                border-radius: 5px;
-            }
-            QPushButton:hover {
-                background: #f6f6f6;
-                border-radius: 5px;
-                color: {color};
-            }
-            """
-    
+        }
+        QLabel[variant="status"] {
+            font-size: 40px;
+        }
+        QLabel[variant="result"] {
+            font-size: 25px;
+        }
+        QLabel[variant="substatus"] {
+            font-size: 20px;
+        }
+    """
+
+    menu_button_style = """
+        QPushButton[variant="menu"] {
+            font-size: 15px;
+            font-weight: bold;
+            margin-top: 10px;
+            border: 3px solid #de8400;
+            background-color: #ff9800;
+            color: white;
+            border-radius: 5px;
+        }
+        QPushButton[variant="menu"]:hover {
+            border: 3px solid #cd7a00;
+            background-color: #f49100;
+        }
+    """
+
     input_style = """
         QLineEdit {
             font-size: 14px;
@@ -69,4 +65,7 @@ class GameStyles():
         QLineEdit:focus {
             border: 2px solid #de8400;
         }
-    """
\ No newline at end of file
+    """
+
+    # Таблица стилей всего приложения, разбирается один раз, а не для каждого виджета
+    application_style = background_style + label_style + menu_button_style + input_style
\ No newline at end of file
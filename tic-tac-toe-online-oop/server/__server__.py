@@ -1,38 +1,180 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from typing import Dict, Optional
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from game_export import GameExporter, create_exporter
+from timer_wheel import Timer, TimerWheel
+from sorted_index import SortedIndex
+from heartbeat import Heartbeat, create_heartbeat
+from actors import ActorSystem, create_actor_system
+import asyncio
+import secrets
+import time
+import os
 import uvicorn
 import json
 
+class Outbox():
+    """
+    Очередь исходящих сообщений соединения и задача, которая отправляет их по порядку
+    Медленный клиент задерживает только свою очередь, а не воркеры акторов и рассылку другим игрокам
+    Переполненная очередь значит, что клиент не успевает читать: соединение закрывается,
+    а клиент получит пропущенное, переподключившись по токену
+    """
+    limit = 256
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.queue: asyncio.Queue[str] = asyncio.Queue()
+        self.overflowed = False
+        self.task = asyncio.create_task(self.run())
+
+    def put(self, message: str) -> bool:
+        if self.overflowed:
+            return False
+        if self.queue.qsize() >= self.limit:
+            self.overflowed = True
+            self.task.cancel()
+            asyncio.create_task(self.abort())
+            return False
+        self.queue.put_nowait(message)
+        return True
+
+    async def run(self):
+        while True:
+            message = await self.queue.get()
+            try:
+                await self.websocket.send_text(message)
+            except Exception as e:
+                # Соединение уже закрывается, его уберет обработчик отключения или heartbeat
+                print(f"Error sending message: {e!r}")
+                return
+
+    async def abort(self):
+        try:
+            await self.websocket.close(code=1013)
+        except Exception:
+            pass
+
+    def close(self):
+        self.task.cancel()
+
 class ConnectionManager():
     """ Класс для управления соединением с игроками """
-    def __init__(self):
+    def __init__(self, heartbeat: Optional[Heartbeat] = None):
         self.active_connections: Dict[int, Dict[str, WebSocket]] = {}
+        self.connection_games: Dict[WebSocket, Set[Tuple[int, str]]] = {} # соединение -> (id игры, имя игрока)
+        self.heartbeat = heartbeat or Heartbeat() # Живость и RTT соединений, в которых есть хотя бы одна игра
+        self.outboxes: Dict[WebSocket, Outbox] = {} # Исходящие очереди соединений, в которых есть хотя бы одна игра
+        # Ожидающие изменений HTTP-клиенты (long-poll): одно событие на игру, создается при первом ожидании
+        # и заменяется новым при каждом изменении версии
+        self.state_events: Dict[int, asyncio.Event] = {}
           
     async def connect(self, websocket: WebSocket, game_id: int, player_name: str):
         """ При подключении разрешаем соединение и добавляем в список активных подключений """
         await websocket.accept()
+        await self.register(websocket, game_id, player_name)
+
+    async def register(self, websocket: WebSocket, game_id: int, player_name: str, close_old: bool = True):
+        """ Добавляет уже принятое соединение в список активных подключений игры """
         if game_id not in self.active_connections:
             self.active_connections[game_id] = {}
+        old_websocket = self.active_connections[game_id].get(player_name)
         self.active_connections[game_id][player_name] = websocket
+        self.connection_games.setdefault(websocket, set()).add((game_id, player_name))
+        self.heartbeat.add(websocket)
+        if websocket not in self.outboxes:
+            self.outboxes[websocket] = Outbox(websocket)
+        if old_websocket is not None and old_websocket is not websocket:
+            self.forget(old_websocket, game_id, player_name)
+
+        # Игрок вернулся по токену раньше, чем сервер заметил обрыв: закрываем старое соединение
+        if close_old and old_websocket is not None and old_websocket is not websocket:
+            try:
+                await old_websocket.close()
+            except RuntimeError:
+                pass
 
     async def disconnect(self, game_id: int, player_name: str):
         """ При отключении разрываем соединение и удаляем из списка активных подключений """
         if game_id in self.active_connections and player_name in self.active_connections[game_id]:
-            del self.active_connections[game_id][player_name]
+            self.forget(self.active_connections[game_id].pop(player_name), game_id, player_name)
             if not self.active_connections[game_id]:
                 del self.active_connections[game_id]
                    
-    async def broadcast(self, game_id: int, message: str):
+    def forget(self, websocket: WebSocket, game_id: int, player_name: str):
+        """ Убирает игру из списка игр соединения; соединение без игр больше не проверяется heartbeat """
+        games = self.connection_games.get(websocket)
+        if games is None:
+            return
+        games.discard((game_id, player_name))
+        if not games:
+            del self.connection_games[websocket]
+            self.heartbeat.remove(websocket)
+            outbox = self.outboxes.pop(websocket, None)
+            if outbox:
+                outbox.close()
+
+    def is_current(self, game_id: int, player_name: str, websocket: WebSocket) -> bool:
+        """ Проверяет, что игрок подключен именно через этот сокет (а не через более новый после переподключения) """
+        return self.active_connections.get(game_id, {}).get(player_name) is websocket
+
+    async def send(self, websocket: WebSocket, message: str):
+        """
+        Отправляет сообщение соединению через его исходящую очередь, не дожидаясь отправки
+        Соединение без игр (очереди еще нет) получает сообщение сразу
+        Соединение, в которое не удалось отправить (оно уже закрывается), пропускается:
+        его уберет обработчик отключения или heartbeat
+        """
+        outbox = self.outboxes.get(websocket)
+        if outbox is not None:
+            outbox.put(message)
+            return
+        try:
+            await websocket.send_text(message)
+        except Exception as e:
+            print(f"Error sending message: {e!r}")
+
+    async def broadcast(self, game_id: int, message: str, exclude: Optional[str] = None):
         """ Рассылает всем участникам определенной игры сообщение """
         if game_id in self.active_connections:
-            for ws in self.active_connections[game_id].values():
-                await ws.send_text(message)
+            for name, ws in list(self.active_connections[game_id].items()):
+                if name != exclude:
+                    await self.send(ws, message)
 
-    async def broadcast_game_state(self, gamemanager: 'GameManager', game_id: int):
+    async def broadcast_game_state(self, gamemanager: 'GameManager', game_id: int, exclude: Optional[str] = None):
         """ Рассылает всем участникам определенной игры ее состояние """
         game_state = gamemanager.get_game_state(game_id)
         if game_state:
-            await self.broadcast(game_id, json.dumps(game_state))
+            await self.broadcast(game_id, json.dumps(game_state), exclude)
+
+    def notify_state(self, game_id: int):
+        """
+        Будит HTTP-клиентов, ожидающих изменения состояния игры
+        Вызывается GameManager при каждом изменении версии игры и при ее удалении
+        """
+        event = self.state_events.pop(game_id, None)
+        if event is not None:
+            event.set()
+
+    async def wait_for_state(self, gamemanager: 'GameManager', game_id: int, since: int, timeout: float):
+        """
+        Ждет, пока версия игры станет больше since, игра будет удалена или пройдет timeout секунд
+        Ожидающие спят на общем событии игры и не тратят процессор, пока состояние не изменится
+        """
+        game = gamemanager.games.get(game_id)
+        if game is None:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while gamemanager.games.get(game_id) is game and game.version <= since:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            event = self.state_events.setdefault(game_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
 
     async def broadcast_game_over(self, gamemanager: 'GameManager', game_id: int):
         """ Рассылает всем участникам определенной игры сообщение об ее завершении """
@@ -42,7 +184,9 @@ class ConnectionManager():
         game = gamemanager.games[game_id]
         message = json.dumps({
             "type": "game_over",
-            "winner": "Ничья!" if game.winner == "draw" else game.winner
+            "game_id": game_id,
+            "winner": "Ничья!" if game.winner == "draw" else game.winner,
+            "reason": game.finish_reason # "timeout", если игрок не успел сходить
         })
         await self.broadcast(game_id, message)
 
@@ -53,6 +197,7 @@ class Player:
         self.name: str = name
         self.symbol: str = symbol
         self.color: str = color
+        self.token: str = secrets.token_urlsafe(16) # Токен для возобновления сессии после обрыва связи
 
 class Board:
     """Класс для создания поля 3x3 для крестиков-ноликов"""
@@ -64,8 +209,10 @@ class Board:
         Пытается сделать ход игрока в указанную позицию
         Возвращает True если ход допустим, иначе False
         """
+        if not 0<=x<3 or not 0<=y<3:
+            return False
         move_position = x + y*3
-        if self.cells[move_position] != " " or not 0<=x<3 or not 0<=y<3:
+        if self.cells[move_position] != " ":
             return False
         self.cells[move_position] = player.symbol
         return True
@@ -94,6 +241,10 @@ class Game:
     ]
 
     def __init__(self, player1: Player, player2: Optional[Player]):
+        self.game_id = 0
+        self.instance = 0 # Номер экземпляра игры: у пересозданной игры с тем же id версии начинаются заново
+        self.state_listener = None # Вызывается при смене статуса: (игра, старый статус, новый статус)
+        self.version_listener = None # Вызывается при каждом изменении версии: (игра)
         self.players = [player1, player2]
         self.current_player_index = 0
         if player2 is not None:
@@ -102,6 +253,40 @@ class Game:
             self.state = "waiting"
         self.winner = ""
         self.board = Board()
+        self.version = 0 # Увеличивается при каждом изменении состояния
+        self.round_version = 0 # Версия на начало текущего раунда
+        self.moves: list[tuple[int, int, str]] = [] # Ходы раунда: (версия, клетка, символ)
+        self.finish_reason = ""
+
+        # Контроль времени (заполняет GameManager)
+        self.timer: Optional[Timer] = None # Таймер хода текущего игрока
+        self.turn_started = 0.0
+        self.move_spent = 0.0 # Время, уже потраченное на текущий ход: сохраняется, пока игра на паузе из-за обрыва
+        self.time_left: Dict[str, float] = {} # Запас времени игроков на раунд
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @state.setter
+    def state(self, state: str):
+        old_state = getattr(self, "_state", None)
+        self._state = state
+        if self.state_listener and old_state != state:
+            self.state_listener(self, old_state, state)
+
+    def touch(self):
+        """ Отмечает изменение состояния игры """
+        self.version += 1
+        if self.version_listener:
+            self.version_listener(self)
+
+    def get_player(self, player_name: str) -> Optional[Player]:
+        """ Возвращает игрока по имени """
+        for player in self.players:
+            if player and player.name == player_name:
+                return player
+        return None
 
     def get_current_player(self) -> Optional[Player]:
         """ Возвращает объект текущего игрока """
@@ -140,41 +325,200 @@ class Game:
         """ Сбрасывает состояние игры """
         self.board.clear_board()
         self.winner = ""
+        self.finish_reason = ""
+        self.time_left.clear()
+        self.move_spent = 0.0
         self.current_player_index = 0
         self.state = "in game" if all(p.is_connected for p in self.players if p) else "waiting"
+        self.moves.clear()
+        self.touch()
+        self.round_version = self.version
+
+class TimeControl:
+    """ Контроль времени: лимит на один ход и запас времени игрока на раунд (секунды, None - без ограничения) """
+    def __init__(self, move_seconds: Optional[float] = None, game_seconds: Optional[float] = None):
+        self.move_seconds = move_seconds
+        self.game_seconds = game_seconds
+
+    @property
+    def enabled(self) -> bool:
+        return self.move_seconds is not None or self.game_seconds is not None
+
+def create_time_control(move_seconds: Optional[str], game_seconds: Optional[str]) -> TimeControl:
+    """ Создает контроль времени из переменных окружения MOVE_TIME_LIMIT и GAME_TIME_LIMIT """
+    return TimeControl(float(move_seconds) if move_seconds else None, float(game_seconds) if game_seconds else None)
 
 class GameManager:
-    """ Класс для управления играми """
-    def __init__(self):
+    """
+    Класс для управления играми
+    Поддерживает вторичные индексы: игры игрока, игры по статусу и отсортированный список игр со свободным местом
+    """
+    def __init__(self, exporter: Optional[GameExporter] = None, clock: Callable[[], float] = time.time,
+                 time_control: Optional[TimeControl] = None):
         self.games: Dict[int, Game] = {}
-
-    def connect_to_game(self, game_id: int, player_name: str) -> tuple[bool, str]:
+        self.exporter = exporter # Сохраняет завершенные партии для аналитики
+        self.clock = clock # Источник времени, в симуляции подменяется ненастоящими часами
+        self.time_control = time_control or TimeControl()
+        self.timers = TimerWheel(clock()) # Одно колесо таймеров на все игры
+        self.on_version: Optional[Callable[[int], None]] = None # Подписчик на изменения версий игр (id игры)
+        self.games_by_state: Dict[str, Set[int]] = {"waiting": set(), "in game": set(), "finished": set()}
+        self.player_games: Dict[str, Set[int]] = {} # имя игрока -> id игр
+        self.open_games = SortedIndex() # id игр, в которых есть свободное место, по возрастанию
+        self.instances = 0 # Счетчик созданных игр, дает каждой игре уникальный номер экземпляра
+
+    def add_game(self, game_id: int, game: Game):
+        """ Добавляет игру и заносит ее во все индексы """
+        game.game_id = game_id
+        self.instances += 1
+        game.instance = self.instances
+        game.state_listener = self.on_state_change
+        game.version_listener = self.on_version_change
+        self.games[game_id] = game
+        self.games_by_state.setdefault(game.state, set()).add(game_id)
+        for player in game.players:
+            if player:
+                self.player_games.setdefault(player.name, set()).add(game_id)
+        if game.players[1] is None:
+            self.open_games.add(game_id)
+
+    def remove_game(self, game_id: int):
+        """ Удаляет игру из словаря игр и из всех индексов """
+        game = self.games.pop(game_id)
+        if game.timer:
+            self.timers.cancel(game.timer)
+            game.timer = None
+        game.version_listener = None
+        if self.on_version:
+            self.on_version(game_id)
+        self.games_by_state.get(game.state, set()).discard(game_id)
+        for player in game.players:
+            if player:
+                games = self.player_games.get(player.name)
+                if games is not None:
+                    games.discard(game_id)
+                    if not games:
+                        del self.player_games[player.name]
+        self.close_seat(game_id)
+
+    def close_seat(self, game_id: int):
+        """ Убирает игру из списка игр со свободным местом """
+        self.open_games.discard(game_id)
+
+    def on_version_change(self, game: Game):
+        if self.on_version:
+            self.on_version(game.game_id)
+
+    def on_state_change(self, game: Game, old_state: Optional[str], new_state: str):
+        """ Переносит игру между индексами статусов и запускает или останавливает часы хода """
+        if old_state is not None:
+            self.games_by_state.get(old_state, set()).discard(game.game_id)
+        self.games_by_state.setdefault(new_state, set()).add(game.game_id)
+        if old_state == "in game":
+            self.stop_clock(game)
+        if new_state == "in game":
+            self.start_clock(game)
+
+    def start_clock(self, game: Game):
+        """ Ставит таймер хода текущего игрока: лимит на ход, но не больше его оставшегося запаса """
+        control = self.time_control
+        if not control.enabled:
+            return
+        if control.game_seconds is not None and not game.time_left:
+            game.time_left = {player.name: control.game_seconds for player in game.players if player}
+
+        player = game.get_current_player()
+        # После возобновления игры ход продолжается с того же места, а не начинается заново
+        limits = [max(control.move_seconds - game.move_spent, 0.0)] if control.move_seconds is not None else []
+        if player and player.name in game.time_left:
+            limits.append(game.time_left[player.name])
+        game.turn_started = self.clock()
+        game.timer = self.timers.schedule(game.turn_started + min(limits), game)
+
+    def stop_clock(self, game: Game):
+        """ Снимает таймер хода и списывает потраченное время с запаса текущего игрока и с лимита хода """
+        if game.timer is None:
+            return
+        self.timers.cancel(game.timer)
+        game.timer = None
+        spent = self.clock() - game.turn_started
+        game.move_spent += spent
+        player = game.get_current_player()
+        if player and player.name in game.time_left:
+            game.time_left[player.name] = max(game.time_left[player.name] - spent, 0.0)
+
+    def check_timeouts(self) -> List[int]:
+        """
+        Продвигает колесо таймеров до текущего времени и завершает партии, в которых игрок не успел сходить
+        Победа присуждается сопернику. Возвращает id завершенных игр
+        """
+        timed_out = []
+        for game in self.timers.advance(self.clock()):
+            if self.games.get(game.game_id) is not game or game.state != "in game":
+                continue
+            loser = game.get_current_player()
+            winner = next((p for p in game.players if p and p is not loser), None)
+            game.timer = None
+            game.winner = winner.name if winner else "draw"
+            game.finish_reason = "timeout"
+            game.touch()
+            game.state = "finished"
+            if self.exporter:
+                self.exporter.record(game, self.clock())
+            timed_out.append(game.game_id)
+        return timed_out
+
+    def list_open_games(self, cursor: Optional[int] = None, limit: int = 20) -> tuple[List[Dict[str, object]], Optional[int]]:
+        """
+        Возвращает страницу ожидающих игр со свободным местом после id cursor за O(log n + limit)
+        и курсор следующей страницы (None, если страница последняя)
+        """
+        page_ids = self.open_games.after(cursor, limit + 1) # Лишний id показывает, есть ли следующая страница
+        has_more = len(page_ids) > limit
+        page_ids = page_ids[:limit]
+        page = []
+        for game_id in page_ids:
+            host = self.games[game_id].players[0]
+            page.append({"game_id": game_id, "host": host.name if host else ""})
+        next_cursor = page_ids[-1] if has_more else None
+        return page, next_cursor
+
+    def find_player_games(self, player_name: str) -> List[int]:
+        """ Возвращает id игр, в которых участвует игрок """
+        return sorted(self.player_games.get(player_name, ()))
+
+    def connect_to_game(self, game_id: int, player_name: str, token: Optional[str] = None) -> tuple[bool, str]:
         """ 
         Подключает пользователя к игре, если лобби не переполненно и в игре нет участника с тем же именем 
+        Игрок с верным токеном сессии занимает свое место, даже если сервер еще не заметил обрыв старого соединения
         Возвращает результат попытки присоединиться (True, "" or False, "error message")
         """
         # Если игра еще не была созданна, то создаем ее и добавляем первого игрока
         if game_id not in self.games:
             player1 = Player(player_name, "O", "blue")
-            self.games[game_id] = Game(player1, None)
+            self.add_game(game_id, Game(player1, None))
             return True, ""
    
         game = self.games[game_id]
 
         # Проверяет, есть ли в игре игрок с тем же именем, а также обновляет статус игры
-        for player in game.players:
-            if player and player.name == player_name:
-                if player.is_connected:
-                    return False, "Игрок уже подключен"
-                player.is_connected = True
+        player = game.get_player(player_name)
+        if player:
+            if player.is_connected and player.token != token:
+                return False, "Игрок уже подключен"
+            player.is_connected = True
+            if all(p and p.is_connected for p in game.players):
                 game.state = "in game"
-                return True, ""
+            game.touch()
+            return True, ""
 
         # Если игра уже была созданна, а имя игрока не совпадает с именем первого игрока, то добавляем игрока как второго, обновляем статус игры
         if game.players[1] is None:
             player2 = Player(player_name, "X", "red")
             game.players[1] = player2
+            self.player_games.setdefault(player_name, set()).add(game_id)
+            self.close_seat(game_id)
             game.state = "in game"
+            game.touch()
             return True, ""
         
         return False, "Лобби переполнено"
@@ -195,10 +539,11 @@ class GameManager:
         # Если игра была активна, то меняем статус на ожидает
         if game.state == "in game":
             game.state = "waiting"
+        game.touch()
 
         # Удаляем игру только если оба игрока отключены
         if all(not player.is_connected for player in game.players if player):
-            del self.games[game_id]
+            self.remove_game(game_id)
 
     def get_game_state(self, game_id: int) -> Optional[Dict[str, str|object|None]]:
         """ 
@@ -213,97 +558,442 @@ class GameManager:
 
         return {
             "type": "state",
+            "game_id": game_id,
             "board": game.board.get_board(),
             "current_player": current_player.name if current_player else "",
             "state": game.state,
-            "winner": game.winner
+            "winner": game.winner,
+            "version": game.version,
+            "players": {player.name: player.symbol for player in game.players if player}
         }
 
-    def make_move(self, game_id: int, player_name: str, x: int, y: int):
-        """ Пытается сделать ход по определенным координатам """
+    def get_game_delta(self, game_id: int, since: int) -> Optional[Dict[str, str|object|None]]:
+        """
+        Возвращает только изменения игры после версии since (ходы текущего раунда)
+        Если since относится к прошлому раунду, возвращает полное состояние
+        """
         if game_id not in self.games:
-            return 
+            return None
+
+        game = self.games[game_id]
+        if since < game.round_version or since > game.version:
+            return self.get_game_state(game_id)
+
+        current_player = game.get_current_player()
+        return {
+            "type": "delta",
+            "game_id": game_id,
+            "since": since,
+            "moves": [[position, symbol] for version, position, symbol in game.moves if version > since],
+            "current_player": current_player.name if current_player else "",
+            "state": game.state,
+            "winner": game.winner,
+            "version": game.version,
+            "players": {player.name: player.symbol for player in game.players if player}
+        }
+
+    def get_player(self, game_id: int, player_name: str) -> Optional[Player]:
+        """ Возвращает игрока определенной игры по имени """
+        game = self.games.get(game_id)
+        return game.get_player(player_name) if game else None
+
+    def make_move(self, game_id: int, player_name: str, x: int, y: int) -> bool:
+        """
+        Пытается сделать ход по определенным координатам
+        Возвращает True, если ход принят
+        """
+        if game_id not in self.games:
+            return False
 
         game = self.games[game_id]
 
         if game.state != "in game":
-            return
+            return False
 
         current_player = game.get_current_player()
         
         if not current_player or current_player.name != player_name:
-            return
+            return False
         
         if not game.board.make_move(current_player, x, y):
-            return
+            return False
         
+        game.touch()
+        game.moves.append((game.version, x + y*3, current_player.symbol))
         game.update_game_state()
         
         if not game.is_game_over():
+            self.stop_clock(game)
+            game.move_spent = 0.0
             game.next_player()
+            self.start_clock(game)
+        elif self.exporter:
+            self.exporter.record(game, self.clock())
+        return True
 
 app = FastAPI()
-app.state.connectionmanager = ConnectionManager()
-app.state.gamemanager = GameManager()
+app.state.connectionmanager = ConnectionManager(
+    create_heartbeat(os.environ.get("HEARTBEAT_INTERVAL"), os.environ.get("HEARTBEAT_TIMEOUT"))
+)
+app.state.gamemanager = GameManager(
+    create_exporter(os.environ.get("GAME_EXPORT_DIR")),
+    time_control=create_time_control(os.environ.get("MOVE_TIME_LIMIT"), os.environ.get("GAME_TIME_LIMIT"))
+)
+# HTTP long-poll просыпается при любом изменении версии игры, а не только при рассылке по веб-сокетам
+app.state.gamemanager.on_version = app.state.connectionmanager.notify_state
+# Игровые сообщения выполняются акторами игр, а не в корутине соединения, которое их получило
+app.state.actors = create_actor_system(os.environ.get("ACTOR_WORKERS"), os.environ.get("ACTOR_MAILBOX_SIZE"))
+
+async def watch_timeouts():
+    """ Одна задача на весь сервер: раз в тик колеса завершает партии с истекшим временем хода """
+    connectionmanager: ConnectionManager = app.state.connectionmanager
+    gamemanager: GameManager = app.state.gamemanager
+    while True:
+        await asyncio.sleep(gamemanager.timers.tick)
+        try:
+            timed_out = gamemanager.check_timeouts()
+        except Exception as e:
+            print(f"Error checking timeouts: {e!r}")
+            continue
+        for game_id in timed_out:
+            # Как и после обычного завершения: состояние, результат и новый раунд
+            # Ошибка рассылки в одной игре не должна оставить ее без нового раунда или остановить проверку остальных
+            try:
+                await connectionmanager.broadcast_game_state(gamemanager, game_id)
+                await connectionmanager.broadcast_game_over(gamemanager, game_id)
+            except Exception as e:
+                print(f"Error finishing game {game_id} after timeout: {e!r}")
+            finally:
+                game = gamemanager.games.get(game_id)
+                if game:
+                    game.reset_game()
 
-@app.websocket("/ws/{game_id}/{player_name}")
-async def websocket_endpoint(websocket: WebSocket, game_id: int, player_name: str):
+async def watch_heartbeats():
+    """
+    Одна задача на весь сервер: раз в интервал heartbeat отключает мертвые соединения,
+    рассылает ping живым и сообщает участникам игр сглаженный RTT каждого игрока
+    """
+    connectionmanager: ConnectionManager = app.state.connectionmanager
+    heartbeat = connectionmanager.heartbeat
+    while True:
+        await asyncio.sleep(heartbeat.interval)
+        # Ошибка с одним соединением или игрой не должна останавливать проверку всего сервера
+        for websocket in heartbeat.dead():
+            try:
+                await drop_connection(websocket)
+            except Exception as e:
+                print(f"Error dropping dead connection: {e!r}")
+
+        for websocket in list(heartbeat.peers):
+            ping = heartbeat.next_ping(websocket)
+            if ping is None:
+                continue
+            await connectionmanager.send(websocket, json.dumps(ping))
+
+        for game_id, connections in list(connectionmanager.active_connections.items()):
+            players = {name: heartbeat.latency(websocket) for name, websocket in connections.items()}
+            if any(rtt is not None for rtt in players.values()):
+                try:
+                    await connectionmanager.broadcast(game_id, json.dumps({"type": "latency", "game_id": game_id, "players": players}))
+                except Exception as e:
+                    print(f"Error reporting latency of game {game_id}: {e!r}")
+
+async def drop_connection(websocket: WebSocket):
+    """ Освобождает места игрока мертвого соединения во всех его играх и закрывает соединение """
+    connectionmanager: ConnectionManager = app.state.connectionmanager
+    for game_id, player_name in list(connectionmanager.connection_games.get(websocket, ())):
+        await leave_game(websocket, game_id, player_name)
+    connectionmanager.heartbeat.remove(websocket)
+    try:
+        await websocket.close(code=1001)
+    except RuntimeError:
+        pass
+
+@app.on_event("startup")
+async def start_timeouts():
+    if app.state.gamemanager.time_control.enabled:
+        app.state.timeouts_task = asyncio.create_task(watch_timeouts())
+    app.state.heartbeat_task = asyncio.create_task(watch_heartbeats())
+    app.state.actors.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """ Дописывает на диск партии, оставшиеся в буфере экспорта, и останавливает фоновые задачи """
+    for name in ("timeouts_task", "heartbeat_task"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+    await app.state.actors.stop()
+    exporter = app.state.gamemanager.exporter
+    if exporter:
+        exporter.close()
+
+@app.get("/lobby")
+async def lobby(cursor: Optional[int] = None, limit: int = 20):
+    """ Постраничный список игр, к которым можно присоединиться """
+    gamemanager: GameManager = app.state.gamemanager
+    games, next_cursor = gamemanager.list_open_games(cursor, max(1, min(limit, 100)))
+    return {"games": games, "next_cursor": next_cursor}
+
+@app.get("/players/{player_name}/games")
+async def player_games(player_name: str):
+    """ Игры, в которых участвует игрок (например, чтобы вернуться в свою игру) """
+    gamemanager: GameManager = app.state.gamemanager
+    return {"games": gamemanager.find_player_games(player_name)}
+
+@app.get("/health/latency")
+async def latency():
+    """ Гистограмма RTT соединений игроков по замерам heartbeat """
+    connectionmanager: ConnectionManager = app.state.connectionmanager
+    return connectionmanager.heartbeat.summary()
+
+@app.get("/health/actors")
+async def actors():
+    """ Глубина очередей самых загруженных игр и время ожидания сообщений в очередях акторов """
+    actor_system: ActorSystem = app.state.actors
+    return actor_system.metrics()
+
+@app.get("/games/{game_id}/state")
+async def game_state(request: Request, game_id: int, since: Optional[int] = None, timeout: float = 30):
+    """
+    Состояние игры по HTTP - запасной вариант для клиентов, у которых не работает веб-сокет
+    ETag - номер экземпляра и версия игры: если у клиента уже эта версия (If-None-Match), отвечаем 304
+    С since запрос ждет (long-poll) до timeout секунд, пока версия игры не станет больше since
+    """
+    connectionmanager: ConnectionManager = app.state.connectionmanager
+    gamemanager: GameManager = app.state.gamemanager
+    if game_id not in gamemanager.games:
+        raise HTTPException(status_code=404, detail="Игра не найдена")
+
+    if since is not None:
+        await connectionmanager.wait_for_state(gamemanager, game_id, since, max(0.0, min(timeout, 60.0)))
+        # Пока ждали, игроки могли выйти и игра - удалиться
+        if game_id not in gamemanager.games:
+            raise HTTPException(status_code=404, detail="Игра не найдена")
+
+    game = gamemanager.games[game_id]
+    etag = f'"{game.instance}.{game.version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or
+                          etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(gamemanager.get_game_state(game_id), headers=headers)
+
+async def join_game(websocket: WebSocket, game_id: int, player_name: str, token: Optional[str] = None, since: Optional[int] = None, close_old: bool = True) -> bool:
+    """
+    Подключает игрока уже принятого соединения к игре и рассылает начальное состояние
+    Возвращает False и отправляет клиенту ошибку, если подключиться не удалось
+    """
     connectionmanager: ConnectionManager = websocket.app.state.connectionmanager
     gamemanager: GameManager = websocket.app.state.gamemanager
 
-    # Пытаемся подключить пользователя к игре
-    success, error_msg = gamemanager.connect_to_game(game_id, player_name)
+    # Пытаемся подключить пользователя к игре (token и since передает клиент, который переподключается)
+    success, error_msg = gamemanager.connect_to_game(game_id, player_name, token)
 
     # Если не получилось, отправляем сообщение ошибки
     if not success:
-        await websocket.accept()
         await websocket.send_text(json.dumps({
             "type": "error",
+            "game_id": game_id,
             "error": error_msg
         }))
-        await websocket.close()
-        return
+        return False
     
     # Добавляем игрока в список активных подключений
-    await connectionmanager.connect(websocket, game_id, player_name)
-
-    try:
+    await connectionmanager.register(websocket, game_id, player_name, close_old)
+
+    # Выдаем клиенту токен, по которому он сможет вернуться на свое место
+    player = gamemanager.get_player(game_id, player_name)
+    player_token = player.token if player else None
+    await connectionmanager.send(websocket, json.dumps({
+        "type": "session",
+        "game_id": game_id,
+        "token": player_token,
+        "symbol": player.symbol if player else ""
+    }))
+
+    if token is not None and token == player_token and since is not None:
+        # Возобновление сессии: клиенту - только пропущенные изменения, остальным - новое состояние
+        delta = gamemanager.get_game_delta(game_id, since)
+        if delta:
+            await connectionmanager.send(websocket, json.dumps(delta))
+        await connectionmanager.broadcast_game_state(gamemanager, game_id, exclude=player_name)
+    else:
         # Сразу отправляем состояние игры всем игрокам
         await connectionmanager.broadcast_game_state(gamemanager, game_id)
-        
-        while True:
-            data = await websocket.receive_text()
+    return True
+
+async def receive_message(websocket: WebSocket) -> dict:
+    """
+    Ждет следующее сообщение клиента
+    Любое сообщение отмечает соединение живым, а ответы pong обрабатываются здесь и дальше не передаются
+    Сообщения, которые не являются JSON-объектом со строковым полем type, пропускаются
+    """
+    heartbeat = websocket.app.state.connectionmanager.heartbeat
+    while True:
+        data = await websocket.receive_text()
+        heartbeat.seen(websocket)
+        try:
             message = json.loads(data)
-            
-            if message["type"] == "get_state":
-                """ Если клиент запросил состояние игры, рассылаем его """
-                await connectionmanager.broadcast_game_state(gamemanager, game_id)
+        except ValueError:
+            continue
+        if not isinstance(message, dict) or not isinstance(message.get("type"), str):
+            continue
+        if message["type"] == "pong":
+            heartbeat.on_pong(websocket, message)
+            continue
+        return message
+
+def parse_int(value: object) -> Optional[int]:
+    """ Целое число из поля сообщения или None, если значение не целое (bool тоже не считается числом) """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return None
+    return None
+
+async def dispatch_game_message(websocket: WebSocket, game_id: int, player_name: str, message: dict):
+    """
+    Передает игровое сообщение в очередь актора игры
+    Если очередь переполнена, ход сразу отклоняется, чтобы клиент откатил показанный заранее ход
+    """
+    actor_system: ActorSystem = websocket.app.state.actors
+    if actor_system.submit(game_id, lambda: handle_game_message(websocket, game_id, player_name, message)):
+        return
 
-            elif message["type"] == "make_move":
-                """ Если игрок отправил запрос о ходе, пытаемся его сделать """
-                try:
-                    x = int(message["x"])
-                    y = int(message["y"])
-                except (KeyError, ValueError):
-                    continue
-                
-                # Пытаемся сделать ход по полученным из запроса координатам
-                gamemanager.make_move(game_id, player_name, x, y)
-                
-                # Отправляем обновленное состояние
-                await connectionmanager.broadcast_game_state(gamemanager, game_id)
-                
-                # Отправляем результат игры если игра завершена
-                game = gamemanager.games.get(game_id)
-                if game and game.state == "finished":
-                    await connectionmanager.broadcast_game_over(gamemanager, game_id)
-                    game.reset_game()
+    if message.get("type") == "make_move":
+        game = websocket.app.state.gamemanager.games.get(game_id)
+        await websocket.app.state.connectionmanager.send(websocket, json.dumps({
+            "type": "move_rejected",
+            "game_id": game_id,
+            "version": game.version if game else -1
+        }))
+
+async def handle_game_message(websocket: WebSocket, game_id: int, player_name: str, message: dict):
+    """ Обрабатывает игровое сообщение игрока: запрос состояния или ход """
+    connectionmanager: ConnectionManager = websocket.app.state.connectionmanager
+    gamemanager: GameManager = websocket.app.state.gamemanager
+
+    if message["type"] == "get_state":
+        """ Если клиент запросил состояние игры, отправляем его только ему: у остальных оно не изменилось """
+        game_state = gamemanager.get_game_state(game_id)
+        if game_state:
+            await connectionmanager.send(websocket, json.dumps(game_state))
+
+    elif message["type"] == "make_move":
+        """ Если игрок отправил запрос о ходе, пытаемся его сделать """
+        x = parse_int(message.get("x"))
+        y = parse_int(message.get("y"))
+        if x is None or y is None:
+            return
+
+        # Пытаемся сделать ход по полученным из запроса координатам
+        # Клиент уже показал ход у себя, при отказе сообщаем только ему, чтобы он откатил доску
+        if not gamemanager.make_move(game_id, player_name, x, y):
+            game = gamemanager.games.get(game_id)
+            await connectionmanager.send(websocket, json.dumps({
+                "type": "move_rejected",
+                "game_id": game_id,
+                "version": game.version if game else -1
+            }))
+            return
+
+        # Отправляем обновленное состояние
+        await connectionmanager.broadcast_game_state(gamemanager, game_id)
+
+        # Отправляем результат игры если игра завершена
+        game = gamemanager.games.get(game_id)
+        if game and game.state == "finished":
+            await connectionmanager.broadcast_game_over(gamemanager, game_id)
+            game.reset_game()
+
+async def leave_game(websocket: WebSocket, game_id: int, player_name: str):
+    """ Отключает игрока от игры, если он еще не вернулся в нее через другое соединение """
+    connectionmanager: ConnectionManager = websocket.app.state.connectionmanager
+    gamemanager: GameManager = websocket.app.state.gamemanager
+
+    # Если игрок уже вернулся через новое соединение, старое просто забываем
+    if not connectionmanager.is_current(game_id, player_name, websocket):
+        return
+
+    # При отключении игрока помечаем его в игре отключенным, а также разрываем соединение
+    gamemanager.disconnect_from_game(game_id, player_name)
+    await connectionmanager.disconnect(game_id, player_name)
+    await connectionmanager.broadcast_game_state(gamemanager, game_id)
+    if game_id not in gamemanager.games:
+        actor_system: ActorSystem = websocket.app.state.actors
+        actor_system.discard(game_id)
+
+@app.websocket("/ws/{game_id}/{player_name}")
+async def websocket_endpoint(websocket: WebSocket, game_id: int, player_name: str, token: Optional[str] = None, since: Optional[int] = None):
+    """ Одно соединение - одна игра """
+    await websocket.accept()
+    if not await join_game(websocket, game_id, player_name, token, since):
+        await websocket.close()
+        return
+
+    try:
+        while True:
+            message = await receive_message(websocket)
+            await dispatch_game_message(websocket, game_id, player_name, message)
     
     except WebSocketDisconnect:
-        # При отключении игрока помечаем его в игре отключенным, а также разрываем соединение
-        gamemanager.disconnect_from_game(game_id, player_name)
-        await connectionmanager.broadcast_game_state(gamemanager, game_id)
-        await connectionmanager.disconnect(game_id, player_name)
+        pass
+    finally:
+        # Место освобождается при любом завершении обработчика, а не только при штатном отключении
+        await leave_game(websocket, game_id, player_name)
+
+@app.websocket("/ws")
+async def multiplexed_endpoint(websocket: WebSocket):
+    """
+    Одно соединение - много игр (для ботов и турниров)
+    Каждое сообщение содержит game_id: join (с player_name, token, since), leave, get_state, make_move
+    """
+    await websocket.accept()
+    joined: Dict[int, str] = {} # игры этого соединения: game_id -> имя игрока
+
+    try:
+        while True:
+            message = await receive_message(websocket)
+            game_id = parse_int(message.get("game_id"))
+            if game_id is None:
+                continue
+
+            match message["type"]:
+                case "join":
+                    player_name = message.get("player_name")
+                    token = message.get("token")
+                    since = message.get("since")
+                    if game_id in joined or not isinstance(player_name, str) or not player_name:
+                        continue
+                    if token is not None and not isinstance(token, str):
+                        continue
+                    if since is not None:
+                        since = parse_int(since)
+                        if since is None:
+                            continue
+                    # Не закрываем старый сокет игрока: у мультиплексного соединения могут быть и другие игры
+                    if await join_game(websocket, game_id, player_name, token, since, close_old=False):
+                        joined[game_id] = player_name
+                case "leave":
+                    if game_id in joined:
+                        await leave_game(websocket, game_id, joined.pop(game_id))
+                case _:
+                    if game_id in joined:
+                        await dispatch_game_message(websocket, game_id, joined[game_id], message)
+
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # Освобождаем места во всех играх соединения при любом завершении обработчика
+        for game_id, player_name in joined.items():
+            await leave_game(websocket, game_id, player_name)
         
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info", ws_ping_interval=20, ws_ping_timeout=20)
\ No newline at end of file
@@ -0,0 +1,141 @@
+from typing import Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+from collections import deque
+import asyncio
+import time
+
+Job = Callable[[], Awaitable[None]]
+
+class ActorStats():
+    """ Счетчики игры для метрик; живут, пока игру не удалят, а не только пока у нее есть сообщения """
+    __slots__ = ("processed", "dropped", "max_depth")
+
+    def __init__(self):
+        self.processed = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+class Actor():
+    """ Актор игры: очередь сообщений (mailbox) """
+    __slots__ = ("key", "mailbox", "scheduled", "stats")
+
+    def __init__(self, key: Hashable, stats: ActorStats):
+        self.key = key
+        self.mailbox: Deque[tuple[float, Job]] = deque() # (время постановки, задача)
+        self.scheduled = False # Актор уже стоит в очереди готовых или обрабатывается воркером
+        self.stats = stats
+
+class ActorSystem():
+    """
+    Выполняет сообщения игр по модели акторов: у каждой игры своя ограниченная очередь,
+    а общий пул воркеров (задач asyncio) берет игры из очереди готовых по кругу
+    Сообщения, переданные актору, выполняются строго по порядку и не параллельно друг с другом,
+    а воркер за один заход выполняет не больше quantum сообщений игры и ставит ее в конец очереди,
+    поэтому игра с тысячами сообщений не задерживает остальные дольше, чем на quantum сообщений
+    Другие изменения той же игры (подключение, отключение, истечение времени) идут мимо актора:
+    они не прерывают сообщение посередине, только пока задача сообщения не ждет (await) внутри себя,
+    поэтому задачи не должны ждать отправки - сервер кладет ответы в исходящие очереди соединений
+    """
+    def __init__(self, workers: int = 4, mailbox_size: int = 64, quantum: int = 1):
+        self.workers = workers
+        self.mailbox_size = mailbox_size
+        self.quantum = quantum
+        self.actors: Dict[Hashable, Actor] = {} # Только игры, у которых есть необработанные сообщения
+        self.stats: Dict[Hashable, ActorStats] = {} # Счетчики всех игр, получавших сообщения
+        self.ready: asyncio.Queue[Actor] = asyncio.Queue() # Очередь готовых акторов, воркеры ждут на ней без опроса
+        self.tasks: List[asyncio.Task] = []
+        self.processed = 0
+        self.dropped = 0
+        self.waits: Deque[float] = deque(maxlen=10000) # Последние времена ожидания в очереди, с
+
+    def start(self):
+        """ Запускает воркеры; вызывается внутри работающего цикла событий """
+        self.tasks = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def submit(self, key: Hashable, job: Job) -> bool:
+        """
+        Ставит задачу в очередь актора игры
+        Возвращает False, если очередь переполнена - игра не успевает обрабатывать сообщения
+        """
+        actor = self.actors.get(key)
+        if actor is None:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = ActorStats()
+            actor = self.actors[key] = Actor(key, stats)
+        if len(actor.mailbox) >= self.mailbox_size:
+            actor.stats.dropped += 1
+            self.dropped += 1
+            return False
+
+        actor.mailbox.append((time.perf_counter(), job))
+        actor.stats.max_depth = max(actor.stats.max_depth, len(actor.mailbox))
+        if not actor.scheduled:
+            actor.scheduled = True
+            self.ready.put_nowait(actor)
+        return True
+
+    def discard(self, key: Hashable):
+        """ Забывает счетчики удаленной игры (очередь, если она еще есть, дорабатывается) """
+        self.stats.pop(key, None)
+
+    async def worker(self):
+        while True:
+            actor = await self.ready.get()
+            for _ in range(self.quantum):
+                if not actor.mailbox:
+                    break
+                queued_at, job = actor.mailbox.popleft()
+                self.waits.append(time.perf_counter() - queued_at)
+                try:
+                    await job()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # Ошибка одного сообщения (например, сокет закрылся во время отправки) не должна останавливать воркер
+                    print(f"Error processing message of game {actor.key}: {e!r}")
+                actor.stats.processed += 1
+                self.processed += 1
+
+            if actor.mailbox:
+                # Остались сообщения - в конец очереди, после остальных игр
+                self.ready.put_nowait(actor)
+            else:
+                actor.scheduled = False
+                del self.actors[actor.key]
+
+    def metrics(self, top: int = 20) -> Dict[str, object]:
+        """
+        Самые загруженные игры (по текущей и максимальной глубине очереди) и время ожидания сообщений в очереди
+        """
+        waits = sorted(self.waits)
+        def percentile(p: float) -> Optional[float]:
+            return round(waits[min(len(waits) - 1, int(len(waits) * p / 100))] * 1000, 3) if waits else None
+
+        def depth(key: Hashable) -> int:
+            actor = self.actors.get(key)
+            return len(actor.mailbox) if actor else 0
+
+        busiest = sorted(self.stats, key=lambda key: (depth(key), self.stats[key].max_depth), reverse=True)[:top]
+        return {
+            "workers": self.workers,
+            "mailbox_size": self.mailbox_size,
+            "ready": self.ready.qsize(),
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "wait_ms": {"p50": percentile(50), "p99": percentile(99), "max": percentile(100)},
+            "games": {
+                str(key): {"depth": depth(key), "max_depth": self.stats[key].max_depth,
+                           "processed": self.stats[key].processed, "dropped": self.stats[key].dropped}
+                for key in busiest
+            }
+        }
+
+def create_actor_system(workers: Optional[str], mailbox_size: Optional[str]) -> ActorSystem:
+    """ Создает систему акторов из переменных окружения ACTOR_WORKERS и ACTOR_MAILBOX_SIZE """
+    return ActorSystem(int(workers) if workers else 4, int(mailbox_size) if mailbox_size else 64)
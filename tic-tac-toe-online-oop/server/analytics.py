@@ -0,0 +1,90 @@
+from multiprocessing import Pool
+from pathlib import Path
+import numpy as np
+import argparse
+
+# Формат записи описан в game_export.py
+RECORD_DTYPE = np.dtype([
+    ("game_id", "<i8"),
+    ("finished_at", "<f8"),
+    ("moves", "i1", (9,)),
+    ("n_moves", "i1"),
+    ("winner", "i1"),
+])
+
+def analyze_file(path: str, chunk_rows: int = 1_000_000) -> dict:
+    """
+    Считает агрегаты по одному файлу, читая его через memmap кусками по chunk_rows записей
+    Память ограничена размером куска, а не размером файла
+    """
+    rows = Path(path).stat().st_size // RECORD_DTYPE.itemsize # Недописанный хвост файла пропускаем
+    totals = {
+        "games": 0,
+        "winners": np.zeros(3, dtype=np.int64),
+        "lengths": np.zeros(10, dtype=np.int64),
+        "first_moves": np.zeros(9, dtype=np.int64),
+        "first_move_wins": np.zeros((9, 3), dtype=np.int64),
+    }
+    if not rows:
+        return totals
+
+    records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(rows,))
+    for start in range(0, rows, chunk_rows):
+        chunk = records[start:start + chunk_rows]
+        winners = chunk["winner"].astype(np.int64)
+        first = chunk["moves"][:, 0].astype(np.int64)
+        played = first >= 0
+
+        totals["games"] += len(chunk)
+        totals["winners"] += np.bincount(winners, minlength=3)[:3]
+        totals["lengths"] += np.bincount(chunk["n_moves"].astype(np.int64), minlength=10)[:10]
+        totals["first_moves"] += np.bincount(first[played], minlength=9)[:9]
+        # Исход партии в зависимости от первой клетки: одна bincount по составному индексу клетка*3+исход
+        totals["first_move_wins"] += np.bincount(first[played] * 3 + winners[played], minlength=27)[:27].reshape(9, 3)
+    del records
+    return totals
+
+def merge(totals: list[dict]) -> dict:
+    result = totals[0]
+    for other in totals[1:]:
+        for key in result:
+            result[key] = result[key] + other[key]
+    return result
+
+def report(totals: dict):
+    games = totals["games"]
+    if not games:
+        print("Нет партий")
+        return
+    draws, wins_o, wins_x = totals["winners"]
+    lengths = totals["lengths"]
+    print(f"партий: {games}")
+    print(f"победы O (первый ход): {wins_o / games:.2%}   победы X: {wins_x / games:.2%}   ничьи: {draws / games:.2%}")
+    print(f"средняя длина партии: {(lengths * np.arange(10)).sum() / games:.2f} хода")
+    print("длина: " + "  ".join(f"{n}:{count}" for n, count in enumerate(lengths) if count))
+    print(f"{'первый ход':<12}{'доля':>8}{'O':>8}{'X':>8}{'ничья':>8}")
+    for cell in range(9):
+        count = totals["first_moves"][cell]
+        if not count:
+            continue
+        outcome = totals["first_move_wins"][cell] / count
+        print(f"{f'({cell // 3}, {cell % 3})':<12}{count / games:>8.2%}{outcome[1]:>8.2%}{outcome[2]:>8.2%}{outcome[0]:>8.2%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Статистика завершенных партий из файлов экспорта")
+    parser.add_argument("directory", help="каталог с файлами games-*.bin")
+    parser.add_argument("--workers", type=int, default=None, help="процессов (по умолчанию - по числу ядер)")
+    parser.add_argument("--chunk", type=int, default=1_000_000, help="записей в одном куске чтения")
+    args = parser.parse_args()
+
+    files = [str(path) for path in sorted(Path(args.directory).glob("games-*.bin"))]
+    if not files:
+        print("Файлы не найдены")
+        return
+
+    with Pool(args.workers) as pool:
+        totals = pool.starmap(analyze_file, [(path, args.chunk) for path in files])
+    report(merge(totals))
+
+if __name__ == "__main__":
+    main()
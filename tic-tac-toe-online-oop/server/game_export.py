@@ -0,0 +1,73 @@
+from pathlib import Path
+from typing import Optional
+import struct
+
+# Запись о завершенной партии фиксированной ширины (27 байт, little-endian, без выравнивания):
+# game_id int64, finished_at float64, moves int8[9] (клетки по порядку, -1 - хода не было), n_moves int8, winner int8
+# Совпадает с dtype в analytics.py, поэтому файлы читаются numpy.memmap без разбора
+RECORD = struct.Struct("<qd9bbb")
+
+# Коды победителя
+WINNER_DRAW = 0
+WINNER_O = 1 # первый игрок, ходит первым
+WINNER_X = 2
+
+class GameExporter():
+    """
+    Пишет завершенные партии в файлы из записей фиксированной ширины
+    Записи копятся в буфере и дописываются в файл пачками, файлы ротируются по количеству записей
+    """
+    def __init__(self, directory: str | Path, rows_per_file: int = 1_000_000, flush_every: int = 1024):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.rows_per_file = rows_per_file
+        self.flush_every = flush_every
+        self.buffer = bytearray()
+        self.buffered_rows = 0
+        self.file_rows = 0
+
+        # Продолжаем нумерацию после уже существующих файлов, старые файлы не дописываем
+        existing = sorted(self.directory.glob("games-*.bin"))
+        self.file_index = int(existing[-1].stem.split("-")[1]) + 1 if existing else 0
+
+    def current_path(self) -> Path:
+        return self.directory / f"games-{self.file_index:06d}.bin"
+
+    def record(self, game, finished_at: float) -> None:
+        """ Добавляет завершенную партию в буфер """
+        moves = [position for _, position, _ in game.moves][:9]
+        winner = WINNER_DRAW
+        if game.winner != "draw":
+            player = game.get_player(game.winner)
+            winner = WINNER_O if player and player.symbol == "O" else WINNER_X
+
+        self.buffer += RECORD.pack(
+            game.game_id, finished_at, *(moves + [-1] * (9 - len(moves))), len(moves), winner
+        )
+        self.buffered_rows += 1
+        if self.buffered_rows >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """ Дописывает буфер в файлы, переходя к новому файлу при заполнении текущего """
+        view = memoryview(self.buffer)
+        written = 0
+        while written < self.buffered_rows:
+            rows = min(self.buffered_rows - written, self.rows_per_file - self.file_rows)
+            with open(self.current_path(), "ab") as file:
+                file.write(view[written * RECORD.size:(written + rows) * RECORD.size])
+            written += rows
+            self.file_rows += rows
+            if self.file_rows >= self.rows_per_file:
+                self.file_index += 1
+                self.file_rows = 0
+        view.release()
+        self.buffer.clear()
+        self.buffered_rows = 0
+
+    def close(self) -> None:
+        self.flush()
+
+def create_exporter(directory: Optional[str]) -> Optional[GameExporter]:
+    """ Создает экспортер, если задан каталог (переменная окружения GAME_EXPORT_DIR) """
+    return GameExporter(directory) if directory else None
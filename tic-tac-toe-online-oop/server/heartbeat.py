@@ -0,0 +1,134 @@
+from typing import Callable, Dict, List, Optional
+import time
+
+class RttHistogram():
+    """ Гистограмма времени отклика (RTT): корзины по степеням двойки в миллисекундах, от 1 мс до ~4 с """
+    bounds = [2 ** i for i in range(13)] # Верхние границы корзин, мс; последняя корзина - все, что больше
+
+    def __init__(self):
+        self.buckets = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.last: Optional[float] = None # Последний замер, мс
+        self.smoothed: Optional[float] = None # Сглаженный RTT, мс (как SRTT в TCP)
+
+    def record(self, rtt_ms: float):
+        index = 0
+        while index < len(self.bounds) and rtt_ms > self.bounds[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += rtt_ms
+        self.last = rtt_ms
+        self.smoothed = rtt_ms if self.smoothed is None else self.smoothed * 0.875 + rtt_ms * 0.125
+
+    def merge(self, other: "RttHistogram"):
+        for index, count in enumerate(other.buckets):
+            self.buckets[index] += count
+        self.count += other.count
+        self.total += other.total
+
+    def percentile(self, p: float) -> Optional[float]:
+        """ Верхняя граница корзины, в которую попадает p-й перцентиль (мс) """
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                return float(self.bounds[index]) if index < len(self.bounds) else float("inf")
+        return None
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 2) if self.count else None,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "buckets": {f"<={bound}": count for bound, count in zip(self.bounds, self.buckets)} | {"more": self.buckets[-1]}
+        }
+
+class Peer():
+    """ Состояние heartbeat одного соединения """
+    __slots__ = ("last_seen", "ping_id", "ping_sent", "histogram")
+
+    def __init__(self, now: float):
+        self.last_seen = now # Когда от соединения последний раз что-то приходило
+        self.ping_id = 0
+        self.ping_sent: Optional[float] = None # Время отправки еще не отвеченного ping
+        self.histogram = RttHistogram()
+
+class Heartbeat():
+    """
+    Проверка живости соединений на уровне протокола игры
+    Раз в interval секунд каждому соединению уходит ping, ответ pong дает замер RTT,
+    а соединение, от которого ничего не приходило дольше timeout секунд, считается мертвым
+    Живостью считается любое входящее сообщение, а не только pong
+    """
+    def __init__(self, interval: float = 2.0, timeout: float = 6.0, clock: Callable[[], float] = time.monotonic):
+        self.interval = interval
+        self.timeout = timeout
+        self.clock = clock
+        self.peers: Dict[object, Peer] = {} # соединение -> состояние
+        self.finished = RttHistogram() # Замеры уже закрытых соединений, чтобы общая статистика их не теряла
+
+    def add(self, connection: object):
+        if connection not in self.peers:
+            self.peers[connection] = Peer(self.clock())
+
+    def remove(self, connection: object):
+        peer = self.peers.pop(connection, None)
+        if peer:
+            self.finished.merge(peer.histogram)
+
+    def seen(self, connection: object):
+        peer = self.peers.get(connection)
+        if peer:
+            peer.last_seen = self.clock()
+
+    def next_ping(self, connection: object) -> Optional[Dict[str, object]]:
+        """ Готовит очередной ping соединению; пока на прошлый нет ответа, новый не отправляется """
+        peer = self.peers.get(connection)
+        if peer is None or peer.ping_sent is not None:
+            return None
+        peer.ping_id += 1
+        peer.ping_sent = self.clock()
+        return {"type": "ping", "id": peer.ping_id}
+
+    def on_pong(self, connection: object, message: dict) -> Optional[float]:
+        """ Обрабатывает pong и возвращает замеренный RTT в мс (None, если pong устарел или чужой) """
+        peer = self.peers.get(connection)
+        if peer is None or peer.ping_sent is None or message.get("id") != peer.ping_id:
+            return None
+        now = self.clock()
+        rtt_ms = (now - peer.ping_sent) * 1000
+        peer.ping_sent = None
+        peer.last_seen = now
+        peer.histogram.record(rtt_ms)
+        return rtt_ms
+
+    def dead(self) -> List[object]:
+        """ Соединения, от которых ничего не приходило дольше timeout """
+        deadline = self.clock() - self.timeout
+        return [connection for connection, peer in self.peers.items() if peer.last_seen < deadline]
+
+    def latency(self, connection: object) -> Optional[float]:
+        """ Сглаженный RTT соединения, мс """
+        peer = self.peers.get(connection)
+        if peer is None or peer.histogram.smoothed is None:
+            return None
+        return round(peer.histogram.smoothed, 1)
+
+    def summary(self) -> Dict[str, object]:
+        """ Общая гистограмма RTT всех соединений, включая закрытые """
+        total = RttHistogram()
+        total.merge(self.finished)
+        for peer in self.peers.values():
+            total.merge(peer.histogram)
+        return {"connections": len(self.peers), "rtt": total.to_dict()}
+
+def create_heartbeat(interval: Optional[str], timeout: Optional[str]) -> Heartbeat:
+    """ Создает heartbeat из переменных окружения HEARTBEAT_INTERVAL и HEARTBEAT_TIMEOUT (секунды) """
+    return Heartbeat(float(interval) if interval else 2.0, float(timeout) if timeout else 6.0)
@@ -0,0 +1,170 @@
+from multiprocessing import Pool
+from typing import Callable, List, Optional
+from __server__ import GameManager, TimeControl
+from game_export import create_exporter
+import tracemalloc
+import argparse
+import random
+import time
+
+# Заранее записанные партии (клетки по порядку ходов) для режима scripted
+SCRIPTS = [
+    [4, 0, 8, 2, 1, 7, 6, 3, 5], # ничья
+    [0, 3, 1, 4, 2], # O выигрывает верхнюю строку
+    [4, 0, 2, 6, 3, 5, 8, 1, 7], # ничья
+    [0, 4, 1, 2, 8, 6], # X выигрывает диагональ
+]
+
+class FakeClock():
+    """ Ненастоящие часы: время идет только при вызове advance, поэтому прогоны воспроизводимы """
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+class Simulation():
+    """
+    Играет партии напрямую через GameManager, без FastAPI, uvicorn и веб-сокетов
+    Замеряет только игровую логику: подключение, ходы, запрос состояния и отключение
+    """
+    def __init__(self, seed: int = 0, policy: str = "random", rounds: int = 1, think_time: float = 1.0,
+                 export_dir: Optional[str] = None, move_limit: Optional[float] = None):
+        self.rng = random.Random(seed)
+        self.clock = FakeClock()
+        self.manager = GameManager(create_exporter(export_dir), clock=self.clock, time_control=TimeControl(move_limit))
+        self.policy = policy
+        self.rounds = rounds
+        self.think_time = think_time
+        self.script = 0
+
+    def choose(self, cells: List[str], move: int) -> int:
+        """ Выбирает клетку следующего хода """
+        if self.policy == "scripted":
+            return SCRIPTS[self.script % len(SCRIPTS)][move]
+        return self.rng.choice([i for i, cell in enumerate(cells) if cell == " "])
+
+    def play_game(self, game_id: int, on_move: Optional[Callable[[], None]] = None) -> int:
+        """ Играет rounds раундов одной игры и возвращает количество сделанных ходов """
+        manager = self.manager
+        names = (f"o{game_id}", f"x{game_id}")
+        for name in names:
+            manager.connect_to_game(game_id, name)
+        game = manager.games[game_id]
+
+        moves = 0
+        for round_number in range(self.rounds):
+            move = 0
+            while not game.is_game_over():
+                state = manager.get_game_state(game_id)
+                position = self.choose(state["board"], move) # type: ignore
+                if on_move:
+                    on_move()
+                manager.make_move(game_id, state["current_player"], position % 3, position // 3) # type: ignore
+                self.clock.advance(self.think_time)
+                manager.check_timeouts()
+                move += 1
+            moves += move
+            self.script += 1
+            if round_number + 1 < self.rounds:
+                game.reset_game()
+
+        for name in names:
+            manager.disconnect_from_game(game_id, name)
+        return moves
+
+    def run(self, games: int, first_id: int = 0) -> int:
+        """ Играет games игр подряд и возвращает количество ходов """
+        moves = 0
+        for game_id in range(first_id, first_id + games):
+            moves += self.play_game(game_id)
+        if self.manager.exporter:
+            self.manager.exporter.close()
+        return moves
+
+    def measure_allocations(self, games: int, first_id: int = 0) -> dict:
+        """
+        Замеряет память на ход через tracemalloc: сколько байт ход выделяет сверх уже занятого (пик)
+        и сколько блоков и байт остается занятым после игр (утечки)
+        Счетчика всех выделений в CPython нет, поэтому считается пиковое, а не суммарное выделение
+        """
+        transient = 0
+        last_current = 0
+
+        def before_move():
+            nonlocal transient, last_current
+            current, peak = tracemalloc.get_traced_memory()
+            transient += max(peak - last_current, 0)
+            tracemalloc.reset_peak()
+            last_current, _ = tracemalloc.get_traced_memory()
+
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        last_current, _ = tracemalloc.get_traced_memory()
+        moves = 0
+        for game_id in range(first_id, first_id + games):
+            moves += self.play_game(game_id, before_move)
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        stats = after.compare_to(before, "filename")
+        retained_blocks = sum(stat.count_diff for stat in stats)
+        retained_bytes = sum(stat.size_diff for stat in stats)
+        return {
+            "moves": moves,
+            "peak_bytes_per_move": transient / max(moves, 1),
+            "retained_blocks_per_move": retained_blocks / max(moves, 1),
+            "retained_bytes_per_move": retained_bytes / max(moves, 1),
+        }
+
+def run_worker(seed: int, games: int, first_id: int, policy: str, rounds: int,
+               move_limit: Optional[float]) -> tuple[int, float]:
+    """ Прогон в отдельном процессе: возвращает (ходов, секунд) """
+    simulation = Simulation(seed, policy, rounds, move_limit=move_limit)
+    start = time.perf_counter()
+    moves = simulation.run(games, first_id)
+    return moves, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Пропускная способность игровой логики без сети")
+    parser.add_argument("--games", type=int, default=100_000, help="количество игр")
+    parser.add_argument("--rounds", type=int, default=1, help="раундов в каждой игре")
+    parser.add_argument("--policy", choices=("random", "scripted"), default="random")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=1, help="процессов (каждый со своим GameManager)")
+    parser.add_argument("--alloc-games", type=int, default=1000, help="игр для замера памяти (0 - не замерять)")
+    parser.add_argument("--move-limit", type=float, help="лимит времени на ход (ход в симуляции длится 1 с)")
+    parser.add_argument("--export", help="каталог для экспорта завершенных партий (только в одном процессе)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.processes > 1:
+        # Игры делятся между процессами поровну, у каждого процесса свое зерно и свой диапазон id
+        share = args.games // args.processes
+        tasks = [(args.seed + i, share + (i < args.games % args.processes), i * (share + 1), args.policy, args.rounds,
+                  args.move_limit)
+                 for i in range(args.processes)]
+        with Pool(args.processes) as pool:
+            results = pool.starmap(run_worker, tasks)
+        moves = sum(m for m, _ in results)
+        cpu_seconds = sum(s for _, s in results)
+    else:
+        simulation = Simulation(args.seed, args.policy, args.rounds, export_dir=args.export, move_limit=args.move_limit)
+        moves = simulation.run(args.games)
+        cpu_seconds = time.perf_counter() - start
+    wall = time.perf_counter() - start
+
+    print(f"игр: {args.games}, раундов: {args.rounds}, ходов: {moves}, процессов: {args.processes}")
+    print(f"ходов/с: {moves / wall:,.0f} (на процесс: {moves / cpu_seconds:,.0f})")
+
+    if args.alloc_games:
+        stats = Simulation(args.seed, args.policy, args.rounds, move_limit=args.move_limit).measure_allocations(args.alloc_games)
+        print(f"пик выделения на ход: {stats['peak_bytes_per_move']:.1f} байт")
+        print(f"остается занятым на ход: {stats['retained_blocks_per_move']:.3f} блоков, "
+              f"{stats['retained_bytes_per_move']:.1f} байт")
+
+if __name__ == "__main__":
+    main()
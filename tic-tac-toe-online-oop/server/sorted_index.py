@@ -0,0 +1,81 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, List, Optional
+
+class SortedIndex():
+    """
+    Отсортированное множество, разбитое на блоки: maxes хранит последний элемент каждого блока,
+    поэтому нужный блок находится бинарным поиском, а вставка и удаление сдвигают только один блок
+    Вставка и удаление - O(log n + block_size), блок делится пополам, когда вырастает вдвое,
+    и удаляется, когда опустел; страница после курсора - O(log n + limit)
+    """
+    def __init__(self, block_size: int = 512):
+        self.block_size = block_size
+        self.blocks: List[List[Any]] = []
+        self.maxes: List[Any] = [] # Последний (наибольший) элемент каждого блока
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, value: Any) -> bool:
+        i = bisect_left(self.maxes, value)
+        if i == len(self.blocks):
+            return False
+        block = self.blocks[i]
+        j = bisect_left(block, value)
+        return j < len(block) and block[j] == value
+
+    def add(self, value: Any):
+        if not self.blocks:
+            self.blocks.append([value])
+            self.maxes.append(value)
+            self.count = 1
+            return
+
+        # Первый блок, чей последний элемент не меньше value; значения больше всех идут в последний блок
+        i = min(bisect_left(self.maxes, value), len(self.blocks) - 1)
+        block = self.blocks[i]
+        j = bisect_left(block, value)
+        if j < len(block) and block[j] == value:
+            return
+        block.insert(j, value)
+        self.maxes[i] = block[-1]
+        self.count += 1
+
+        if len(block) > 2 * self.block_size:
+            half = len(block) // 2
+            self.blocks.insert(i + 1, block[half:])
+            del block[half:]
+            self.maxes[i] = block[-1]
+            self.maxes.insert(i + 1, self.blocks[i + 1][-1])
+
+    def discard(self, value: Any):
+        i = bisect_left(self.maxes, value)
+        if i == len(self.blocks):
+            return
+        block = self.blocks[i]
+        j = bisect_left(block, value)
+        if j == len(block) or block[j] != value:
+            return
+        del block[j]
+        self.count -= 1
+        if block:
+            self.maxes[i] = block[-1]
+        else:
+            del self.blocks[i]
+            del self.maxes[i]
+
+    def after(self, cursor: Optional[Any], limit: int) -> List[Any]:
+        """ Первые limit элементов больше cursor (с начала, если cursor None) """
+        if cursor is None:
+            i = j = 0
+        else:
+            i = bisect_right(self.maxes, cursor)
+            j = bisect_right(self.blocks[i], cursor) if i < len(self.blocks) else 0
+
+        page: List[Any] = []
+        while i < len(self.blocks) and len(page) < limit:
+            page.extend(self.blocks[i][j:j + limit - len(page)])
+            i += 1
+            j = 0
+        return page
@@ -0,0 +1,87 @@
+from typing import Any, Hashable, List, Optional, Set
+import math
+
+class Timer():
+    """ Таймер колеса: срок в тиках и ключ, который вернется при срабатывании """
+    __slots__ = ("expires", "key", "bucket")
+
+    def __init__(self, expires: int, key: Hashable):
+        self.expires = expires
+        self.key = key
+        self.bucket: Optional[Set["Timer"]] = None # Ячейка колеса, в которой лежит таймер
+
+class TimerWheel():
+    """
+    Иерархическое колесо таймеров: levels колес по slots ячеек, ячейка уровня L покрывает slots**L тиков
+    Постановка и отмена таймера - O(1), продвижение на один тик - O(таймеров в ячейке),
+    поэтому таймеры всех игр обслуживает одна задача, сколько бы игр ни было
+    Дальние таймеры лежат на верхних уровнях и по мере приближения срока спускаются на нижние
+    """
+    def __init__(self, now: float, tick: float = 0.1, slots: int = 64, levels: int = 4):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.wheels: List[List[Set[Timer]]] = [[set() for _ in range(slots)] for _ in range(levels)]
+        self.current = math.floor(now / tick) # Последний обработанный тик
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def schedule(self, deadline: float, key: Hashable) -> Timer:
+        """ Ставит таймер на время deadline (в тех же единицах, что и now) """
+        timer = Timer(max(math.ceil(deadline / self.tick), self.current + 1), key)
+        self.place(timer)
+        self.count += 1
+        return timer
+
+    def cancel(self, timer: Timer):
+        """ Снимает таймер, если он еще не сработал """
+        if timer.bucket is not None:
+            timer.bucket.discard(timer)
+            timer.bucket = None
+            self.count -= 1
+
+    def place(self, timer: Timer):
+        """ Кладет таймер в ячейку самого нижнего уровня, который дотягивается до его срока """
+        ahead = timer.expires - self.current
+        for level in range(self.levels):
+            span = self.slots ** level
+            if ahead < span * self.slots or level == self.levels - 1:
+                # Слишком дальний таймер ложится в ячейку верхнего уровня и переложится при ее обработке
+                expires = min(timer.expires, self.current + span * (self.slots - 1))
+                bucket = self.wheels[level][(expires // span) % self.slots]
+                break
+        bucket.add(timer)
+        timer.bucket = bucket
+
+    def advance(self, now: float) -> List[Any]:
+        """ Продвигает колесо до времени now и возвращает ключи сработавших таймеров """
+        target = math.floor(now / self.tick)
+        expired = []
+        while self.current < target:
+            self.current += 1
+            # Когда нижнее колесо проходит полный круг, спускаем таймеры из очередной ячейки уровня выше
+            level = 1
+            while level < self.levels and self.current % (self.slots ** level) == 0:
+                self.cascade(level)
+                level += 1
+
+            bucket = self.wheels[0][self.current % self.slots]
+            if not bucket:
+                continue
+            for timer in list(bucket):
+                if timer.expires <= self.current:
+                    bucket.discard(timer)
+                    timer.bucket = None
+                    self.count -= 1
+                    expired.append(timer.key)
+        return expired
+
+    def cascade(self, level: int):
+        span = self.slots ** level
+        bucket = self.wheels[level][(self.current // span) % self.slots]
+        timers = list(bucket)
+        bucket.clear()
+        for timer in timers:
+            self.place(timer)